@@ -0,0 +1,61 @@
+# app/commit_data.py
+# 同步过程中在内存里流转的提交记录（gitlab_client 拉取 → processor 过滤映射 → sync_service 写库）
+#
+# 一天的有效提交全部拉取完才统一入库，原来每条提交是一个 11~15 个键的 dict：
+# - 改为 __slots__ 对象，省去每条记录的哈希表
+# - 作者名 / 邮箱 / 分支 / 实例名在一天的提交中高度重复，赋值时经 sys.intern 只保留一份
+# 仍然提供 dict 式的读写接口（commit['author_name']、get、setdefault、pop、in），
+# 过滤规则、原始提交日志、diff 统计、to_row 对 dict 与 CommitData 一视同仁
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Iterator
+
+FIELDS = (
+    "instance", "commit_id", "project_id", "branch", "author_name", "author_email", "com_email",
+    "commit_date", "additions", "deletions", "parent_ids", "message",
+    "files", "total_additions", "total_deletions",
+)
+
+# 重复度高的字符串字段
+INTERNED_FIELDS = frozenset(("instance", "branch", "author_name", "author_email", "com_email"))
+
+
+class CommitData(MutableMapping):
+    """
+    提交记录：未赋值的字段视为不存在（"files" in commit 为 False），不支持 FIELDS 以外的键
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, **fields: Any):
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        try:
+            object.__setattr__(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __delitem__(self, key: str) -> None:
+        try:
+            object.__delattr__(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in FIELDS if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"<CommitData({str(self.get('commit_id'))[:8]}..., author={self.get('author_name')})>"
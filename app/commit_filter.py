@@ -0,0 +1,87 @@
+# app/commit_filter.py
+# 提交过滤规则引擎：gitlab_client（拉取阶段）与 processor（入库前）共用同一套规则
+#
+# 规则按顺序判断，命中即返回原因：
+#   merge      父提交数 > 1（合并提交）
+#   ci         作者名 / 作者邮箱 / 提交说明包含 CICD_KEYWORDS，或提交者邮箱包含 CICD_EMAIL_PATTERNS
+#   too_large  additions > MAX_ADDITIONS（只在提交带有 additions 时判断，列表接口不含 stats）
+# 关键词与邮箱规则各自预编译为一个正则，字段拼接后只转一次小写、做一次匹配
+# （re.IGNORECASE 在未命中的长文本上比先 lower() 再匹配慢数倍，而未命中正是常见情况）
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from app.config import config
+
+REASONS = ("merge", "ci", "too_large")
+
+
+def _compile(words: Sequence[str]) -> Optional["re.Pattern[str]"]:
+    words = sorted({w.lower() for w in words if w}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(w) for w in words))
+
+
+class CommitFilter:
+    def __init__(self, keywords: Sequence[str], email_patterns: Sequence[str], max_additions: int):
+        self._keyword_re = _compile(keywords)
+        self._email_re = _compile(email_patterns)
+        self.max_additions = max_additions
+
+    def reason(self, commit: Mapping[str, Any]) -> Optional[str]:
+        """
+        返回提交被过滤的原因（REASONS 之一），有效提交返回 None
+        commit 可以是 GitLab 接口返回的属性字典（committer_email）或入库记录（com_email）
+        """
+        if len(commit.get("parent_ids") or ()) > 1:
+            return "merge"
+
+        if self._keyword_re is not None:
+            # 用 \0 拼接各字段，一次匹配覆盖所有字段且不会跨字段命中
+            text = "\0".join((
+                str(commit.get("author_name") or ""),
+                str(commit.get("author_email") or ""),
+                str(commit.get("message") or ""),
+            )).lower()
+            if self._keyword_re.search(text):
+                return "ci"
+
+        if self._email_re is not None:
+            committer_email = commit.get("com_email") or commit.get("committer_email") or ""
+            if self._email_re.search(committer_email.lower()):
+                return "ci"
+
+        additions = commit.get("additions")
+        if additions is not None and additions > self.max_additions:
+            return "too_large"
+
+        return None
+
+    def split(self, commits: Iterable[Mapping[str, Any]]) -> Tuple[List[Mapping[str, Any]], Dict[str, int]]:
+        """
+        批量过滤：返回 (有效提交列表, {原因: 条数})
+        """
+        accepted = []
+        rejected = dict.fromkeys(REASONS, 0)
+        reason = self.reason
+        for commit in commits:
+            why = reason(commit)
+            if why is None:
+                accepted.append(commit)
+            else:
+                rejected[why] += 1
+        return accepted, rejected
+
+
+@lru_cache(maxsize=8)
+def _build(keywords: Tuple[str, ...], email_patterns: Tuple[str, ...], max_additions: int) -> CommitFilter:
+    return CommitFilter(keywords, email_patterns, max_additions)
+
+
+def get_filter() -> CommitFilter:
+    """
+    按当前配置返回编译好的过滤器（配置不变时复用同一个实例）
+    """
+    return _build(tuple(config.CICD_KEYWORDS), tuple(config.CICD_EMAIL_PATTERNS), config.MAX_ADDITIONS)
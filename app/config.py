@@ -2,12 +2,39 @@
 import os
 from dataclasses import dataclass
 
+# 未配置 GITLAB_INSTANCES 时，由 GITLAB_URL / GITLAB_TOKEN 构成的唯一实例名
+DEFAULT_INSTANCE = "default"
+
+
+@dataclass
+class GitLabInstance:
+    """
+    一个 GitLab 实例（主站 / 区域镜像等），各实例使用独立的持久连接池、并发与限速
+    """
+    # 实例名：写入 commit_records.instance / sync_jobs.instance，不可随意修改
+    name: str
+    url: str
+    token: str = ""
+    # 并发拉取的项目数
+    max_workers: int = 10
+    # 每秒最多发出的 API 请求数（该实例所有线程共享），0 表示不限速
+    requests_per_second: float = 0
+    # 持久连接池大小（保持的最大连接数，应不小于 max_workers）
+    pool_size: int = 10
+    # 每日同步时间（Asia/Shanghai，HH:MM），相同时间的实例在同一次同步中并行拉取
+    schedule: str = "08:00"
+
+
 @dataclass
 class Config:
     # ---------- GitLab 配置 ----------
     GITLAB_URL: str = ""
     # 用于访问 GitLab API 的个人访问令牌（需具备 read_repository 权限）
     GITLAB_TOKEN: str = ""  # TODO: 实际使用时应通过环境变量注入
+    # 多实例：[GitLabInstance(name="main", url=..., token=...), GitLabInstance(name="mirror-sh", ...)]
+    # 为空时只使用上面的 GITLAB_URL / GITLAB_TOKEN（实例名 "default"）；
+    # 同一提交（相同 SHA）出现在多个实例时只保留一条，优先取排在前面的实例
+    GITLAB_INSTANCES: list = None
 
     # ---------- 数据源配置 ----------
     # 数据获取方式：固定为 "api"
@@ -16,24 +43,103 @@ class Config:
     # ---------- 映射文件配置 ----------
     # 作者邮箱与姓名映射表路径
     MAPPING_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mapping.xlsx")
+    # 员工名单（姓名、部门两列），看板 / 导出以此补全无提交的人员；同样支持 .csv / .json
+    EMPLOYEES_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "employee.xlsx")
 
     # ---------- 数据库配置 ----------
     # 数据库连接地址，使用 SQLite 作为本地存储
     DATABASE_URL: str = "sqlite:///D:/sqlfile/gitlab.db"
+    # 异步接口使用的数据库地址，留空时由 DATABASE_URL 推导（sqlite:// -> sqlite+aiosqlite://）
+    ASYNC_DATABASE_URL: str = ""
+
+    # ---------- 同步协调配置 ----------
+    # 同步租约有效期（秒），持有者每 1/3 有效期续约一次；进程宕机后超过有效期可被其他进程接管
+    SYNC_LEASE_TTL_SECONDS: int = 120
+    # 同步方式："local" 在当前进程内并发拉取；"queue" 只把项目级任务写入 sync_jobs，
+    # 由一个或多个 `python -m app.worker` 进程领取执行
+    SYNC_MODE: str = "local"
+    # 任务被领取后的可见性超时（秒），worker 会在处理期间持续延长；worker 宕机后超时即可被重新领取
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 600
+    # 单个任务最多尝试次数，超过后标记为 failed
+    JOB_MAX_ATTEMPTS: int = 3
+    # 任务失败后的重试退避基数（秒），第 n 次失败后等待 base * 2^(n-1)
+    JOB_RETRY_BACKOFF_SECONDS: int = 30
+    # Web 进程启动后是否立即补跑一次昨日同步；默认关闭，启动只负责提供服务，同步交给定时任务 / POST /sync / worker
+    SYNC_ON_STARTUP: bool = False
+
+    # ---------- 冷数据归档配置 ----------
+    # 早于该天数的提交会从 commit_records 移入按月分区的 Parquet 文件
+    ARCHIVE_HORIZON_DAYS: int = 90
+    # Parquet 归档目录（每月一个文件：YYYY-MM.parquet）
+    ARCHIVE_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "archive")
+
+    # ---------- 逐文件行数统计 ----------
+    # 开启后额外拉取每个提交的 diff，按文件统计行数并写入 commit_file_stats；
+    # 匹配 DIFF_EXCLUDE_GLOBS 的文件不计入提交行数（MAX_ADDITIONS 也按排除后的行数判断）
+    DIFF_STATS_ENABLED: bool = False
+    # 不含 / 的模式匹配文件名，含 / 的模式匹配完整路径
+    DIFF_EXCLUDE_GLOBS: list = None
+    # 解析后的逐文件行数按提交 SHA 缓存的目录
+    DIFF_CACHE_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "diff_cache")
+    # 同时进行的 diff 请求数（与项目 / 分支并发分开限制）
+    DIFF_FETCH_CONCURRENCY: int = 4
+
+    # ---------- 原始提交日志 ----------
+    # 拉取到的原始提交（含提交说明与被过滤的提交）按天写入 JOURNAL_DIR，修改映射 / 过滤规则后
+    # 可用 `python -m app.reprocess` 离线重算，无需重新请求 GitLab
+    JOURNAL_ENABLED: bool = True
+    JOURNAL_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "journal")
+
+    # ---------- 日志配置 ----------
+    # 日志级别：DEBUG 时输出逐条提交等明细日志（受下方采样限制）
+    LOG_LEVEL: str = "INFO"
+    # 输出格式："text"（key=value）或 "json"（每行一个 JSON 对象）
+    LOG_FORMAT: str = "text"
+    # 采样：同一条日志模板在每个窗口内最多输出的条数（WARNING 及以上不采样），0 表示不限制
+    LOG_SAMPLE_PER_WINDOW: int = 20
+    LOG_SAMPLE_WINDOW_SECONDS: float = 10
+    # 异步日志队列容量，写满时丢弃新日志而不是阻塞业务线程
+    LOG_QUEUE_SIZE: int = 10000
+
+    # ---------- 请求性能分析配置 ----------
+    # 开启后每个请求返回 Server-Timing 头（db / employees / merge / render 等阶段耗时）
+    PROFILING_ENABLED: bool = False
+    # 按比例抽样采集完整 profile（0 表示只在请求头触发时采集）
+    PROFILE_SAMPLE_RATE: float = 0.0
+    # 请求携带该头（任意非空值）时采集完整 profile
+    PROFILE_TRIGGER_HEADER: str = "X-Profile"
+    # profile 输出目录（pyinstrument 输出 .html，否则 cProfile 输出 .prof）
+    PROFILE_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "profiles")
+    # 超过该耗时（毫秒）的请求记录完整阶段耗时
+    SLOW_REQUEST_MS: float = 1000
 
     # ---------- 提交过滤规则 ----------
     # CICD 提交识别关键词（不区分大小写）
     CICD_KEYWORDS: list = None
+    # 提交者邮箱包含以下片段时视为自动化提交（不区分大小写）
+    CICD_EMAIL_PATTERNS: list = None
     # 最大 additions 阈值
     MAX_ADDITIONS: int = 2000
 
     def __post_init__(self):
         if self.CICD_KEYWORDS is None:
             self.CICD_KEYWORDS = ["ci", "cd", "jenkins", "gitlab-ci", "bot", "auto", "runner"]
+        if self.CICD_EMAIL_PATTERNS is None:
+            self.CICD_EMAIL_PATTERNS = ["noreply", "bot@"]
+        if self.DIFF_EXCLUDE_GLOBS is None:
+            self.DIFF_EXCLUDE_GLOBS = [
+                "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "*.lock", "go.sum",
+                "*.min.js", "*.min.css", "*.map", "*.pb.go", "*_pb2.py", "*.generated.*",
+                "**/vendor/**", "**/node_modules/**", "**/dist/**",
+            ]
+
+    def gitlab_instances(self) -> list:
+        """
+        返回配置的 GitLab 实例列表（按优先级排序）
+        """
+        if self.GITLAB_INSTANCES:
+            return list(self.GITLAB_INSTANCES)
+        return [GitLabInstance(DEFAULT_INSTANCE, self.GITLAB_URL, self.GITLAB_TOKEN)]
 
 # 实例化配置
 config = Config()
-
-# 测试路径（运行后删除）
-print("Mapping file path:", config.MAPPING_FILE)
-print("Database URL:", config.DATABASE_URL)
\ No newline at end of file
@@ -3,12 +3,21 @@ from app.database.models import Base, engine
 # app/database/init_db.py
 
 from app.database.models import Base, engine
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def init_database():
-    Base.metadata.create_all(bind=engine)
-    print("✅ 数据库表已创建")
+    # 迁移模块只在建表时导入，导入 app.database 的进程不额外加载
+    from app.database.migrations import run_migrations
+
+    run_migrations(engine)
+    logger.info("✅ 数据库表已创建")
 
 
 if __name__ == "__main__":
+    from app.utils.logger import setup_logging
+
+    setup_logging()
     init_database()
@@ -0,0 +1,230 @@
+# app/database/archive.py
+# 冷数据归档：commit_records 中的历史数据按月写入 Parquet（ARCHIVE_DIR/YYYY-MM.parquet），
+# 查询时按月份 + 文件内 commit_date 统计信息裁剪分区，只读取所需列
+
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.config import config
+
+# 与 commit_records 表字段一致（多实例前写入的分区没有 instance 列，读取时为 null）
+ARCHIVE_COLUMNS = [
+    "commit_id", "project_id", "branch", "author_name", "author_email", "com_email",
+    "commit_date", "additions", "deletions", "parent_ids", "instance",
+]
+
+PARTITION_PATTERN = re.compile(r"^(\d{4}-\d{2})\.parquet$")
+
+# 分区文件 -> (mtime, 最早提交时间, 最晚提交时间)，文件被改写后自动失效
+_bounds_cache: Dict[str, Tuple[float, datetime, datetime]] = {}
+_write_lock = threading.Lock()
+
+
+def _pyarrow():
+    """
+    延迟导入 pyarrow：没有归档文件时查询路径完全不依赖它
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("读取 / 写入 Parquet 归档需要安装 pyarrow") from e
+    return pa, pq
+
+
+def _schema():
+    pa, _ = _pyarrow()
+    return pa.schema([
+        ("commit_id", pa.string()),
+        ("project_id", pa.int64()),
+        ("branch", pa.string()),
+        ("author_name", pa.string()),
+        ("author_email", pa.string()),
+        ("com_email", pa.string()),
+        ("commit_date", pa.timestamp("us")),
+        ("additions", pa.int64()),
+        ("deletions", pa.int64()),
+        ("parent_ids", pa.string()),
+        ("instance", pa.string()),
+    ])
+
+
+def month_of(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    """
+    返回月份的 [月初, 下月初) 时间区间
+    """
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def partition_path(month: str) -> str:
+    return os.path.join(config.ARCHIVE_DIR, f"{month}.parquet")
+
+
+def list_partitions() -> Dict[str, str]:
+    """
+    返回已有的归档分区：{"2025-01": "/path/2025-01.parquet", ...}
+    """
+    if not os.path.isdir(config.ARCHIVE_DIR):
+        return {}
+    partitions = {}
+    for name in os.listdir(config.ARCHIVE_DIR):
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions[match.group(1)] = os.path.join(config.ARCHIVE_DIR, name)
+    return partitions
+
+
+def _partition_bounds(path: str) -> Tuple[datetime, datetime]:
+    """
+    从 Parquet footer 的列统计信息中读取分区内 commit_date 的最小/最大值（按 mtime 缓存）
+    """
+    mtime = os.path.getmtime(path)
+    cached = _bounds_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    _, pq = _pyarrow()
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.to_arrow_schema().get_field_index("commit_date")
+    lows, highs = [], []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is not None and stats.has_min_max:
+            lows.append(stats.min)
+            highs.append(stats.max)
+    if lows:
+        low, high = min(lows), max(highs)
+    else:
+        # 无统计信息时退化为整个月份
+        low, high = month_range(os.path.basename(path)[:7])
+    _bounds_cache[path] = (mtime, low, high)
+    return low, high
+
+
+def partitions_for_range(since: datetime = None, until: datetime = None) -> List[str]:
+    """
+    裁剪出与 [since, until] 有交集的分区文件；范围完全落在热表中时返回空列表
+    """
+    paths = []
+    for month, path in sorted(list_partitions().items()):
+        start, end = month_range(month)
+        if (since and end <= since) or (until and start > until):
+            continue
+        low, high = _partition_bounds(path)
+        if (since and high < since) or (until and low > until):
+            continue
+        paths.append(path)
+    return paths
+
+
+def _read(path: str, columns: List[str], filters: List[Tuple[str, str, Any]]):
+    _, pq = _pyarrow()
+    # 按当前 schema 读取：旧分区缺少的列（如 instance）补为 null
+    return pq.read_table(path, columns=columns, filters=filters or None, schema=_schema())
+
+
+def _range_filters(since: datetime = None, until: datetime = None) -> List[Tuple[str, str, Any]]:
+    filters = []
+    if since:
+        filters.append(("commit_date", ">=", since))
+    if until:
+        filters.append(("commit_date", "<=", until))
+    return filters
+
+
+def merge_archived_author_totals(commit_data: Dict[str, Dict[str, int]],
+                                 since: datetime = None, until: datetime = None) -> Dict[str, Dict[str, int]]:
+    """
+    将归档中 [since, until] 范围内按作者聚合的 additions / deletions 累加进 commit_data（原地修改）
+    commit_data 格式与看板一致：author_name -> {"additions": x, "deletions": y}
+    """
+    filters = _range_filters(since, until)
+    for path in partitions_for_range(since, until):
+        table = _read(path, ["author_name", "commit_date", "additions", "deletions"], filters)
+        if table.num_rows == 0:
+            continue
+        grouped = table.group_by("author_name").aggregate([("additions", "sum"), ("deletions", "sum")])
+        for row in grouped.to_pylist():
+            totals = commit_data.setdefault(row["author_name"], {"additions": 0, "deletions": 0})
+            totals["additions"] += int(row["additions_sum"] or 0)
+            totals["deletions"] += int(row["deletions_sum"] or 0)
+    return commit_data
+
+
+def archived_daily_trend(author: str, since: date, until: date) -> Dict[date, Tuple[int, int]]:
+    """
+    返回归档中某个作者 [since, until] 每天的 (additions, deletions)
+    """
+    since_dt = datetime.combine(since, datetime.min.time())
+    until_dt = datetime.combine(until, datetime.max.time())
+    filters = _range_filters(since_dt, until_dt) + [("author_name", "=", author)]
+
+    trend: Dict[date, Tuple[int, int]] = {}
+    for path in partitions_for_range(since_dt, until_dt):
+        table = _read(path, ["commit_date", "additions", "deletions"], filters)
+        for row in table.to_pylist():
+            day = row["commit_date"].date()
+            adds, dels = trend.get(day, (0, 0))
+            trend[day] = (adds + row["additions"], dels + row["deletions"])
+    return trend
+
+
+def write_partition(month: str, rows: List[Dict[str, Any]], remove_ids: Iterable[str] = ()) -> int:
+    """
+    将一批提交追加到月份分区：与已有文件合并、按 commit_id 去重、按 commit_date 排序后原子替换
+    remove_ids 中的提交会从已有分区中删除（离线重算时用于剔除已不满足规则的提交）
+    返回分区内的总行数
+    """
+    pa, pq = _pyarrow()
+    import pyarrow.compute as pc
+    schema = _schema()
+    incoming = pa.Table.from_pylist([{c: row[c] for c in ARCHIVE_COLUMNS} for row in rows], schema=schema)
+
+    with _write_lock:
+        path = partition_path(month)
+        if os.path.exists(path):
+            existing = pq.read_table(path, schema=schema)
+            # 新数据优先：已归档的同一 commit_id 被覆盖
+            drop_ids = pa.array({row["commit_id"] for row in rows} | set(remove_ids), pa.string())
+            keep = pc.invert(pc.is_in(existing["commit_id"], value_set=drop_ids))
+            incoming = pa.concat_tables([existing.filter(keep), incoming])
+        elif incoming.num_rows == 0:
+            return 0
+
+        os.makedirs(config.ARCHIVE_DIR, exist_ok=True)
+        _bounds_cache.pop(path, None)
+        if incoming.num_rows == 0:
+            os.remove(path)
+            return 0
+
+        table = incoming.sort_by([("commit_date", "ascending")])
+        # 临时文件名带进程号 / 线程号，多个进程同时写同一分区时互不覆盖
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def archived_commits(commit_ids: Iterable[str], months: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    从指定月份分区中读取给定 commit_id 的归档记录：{commit_id: 记录}
+    """
+    ids = list(commit_ids)
+    partitions = list_partitions()
+    found = {}
+    for month in sorted(set(months)):
+        if month not in partitions or not ids:
+            continue
+        table = _read(partitions[month], ARCHIVE_COLUMNS, [("commit_id", "in", ids)])
+        for row in table.to_pylist():
+            found[row["commit_id"]] = row
+    return found
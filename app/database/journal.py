@@ -0,0 +1,106 @@
+# app/database/journal.py
+# 原始提交日志：每次从 GitLab 拉取到的原始提交（含提交说明、未映射的作者名、被过滤掉的提交）按天落盘，
+# 修改 mapping.xlsx / 过滤规则后可离线重算（python -m app.reprocess），无需重新请求 GitLab
+#
+# 布局：JOURNAL_DIR/YYYY-MM-DD/<实例名>/project-<id>.ndjson.gz（日期为同步窗口的起始日），每行一个 JSON 对象
+# （多实例前写入的 YYYY-MM-DD/project-<id>.ndjson.gz 视为 default 实例，仍可读取）
+# 同一天同一项目重新拉取时整体替换（先写临时文件再原子改名），多线程 / 多 worker 进程写入互不冲突
+
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from app.config import config, DEFAULT_INSTANCE
+
+# 列表接口阶段就被过滤的提交没有 stats，additions / deletions 记为 None
+# files / total_* 只在 DIFF_STATS_ENABLED 时存在：逐文件行数与排除前的整提交行数
+JOURNAL_FIELDS = [
+    "instance", "commit_id", "project_id", "branch", "author_name", "author_email", "com_email",
+    "commit_date", "additions", "deletions", "parent_ids", "message",
+    "files", "total_additions", "total_deletions",
+]
+
+DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+FILE_PATTERN = re.compile(r"^project-.+\.ndjson\.gz$")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+def day_dir(day: str) -> str:
+    return os.path.join(config.JOURNAL_DIR, day)
+
+
+def write_project(day: str, project_id: Any, records: Iterable[Dict[str, Any]],
+                  instance: str = DEFAULT_INSTANCE) -> int:
+    """
+    写入（替换）某天某实例某项目的原始提交，返回写入条数
+    """
+    directory = os.path.join(day_dir(day), instance)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"project-{project_id}.ndjson.gz")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        for record in records:
+            f.write(json.dumps({k: record[k] for k in JOURNAL_FIELDS if k in record}, ensure_ascii=False, default=_default))
+            f.write("\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def list_days(since: date = None, until: date = None) -> List[str]:
+    """
+    返回 [since, until] 内有日志的日期（YYYY-MM-DD，升序）
+    """
+    if not os.path.isdir(config.JOURNAL_DIR):
+        return []
+    days = []
+    for name in sorted(os.listdir(config.JOURNAL_DIR)):
+        if not DAY_PATTERN.match(name):
+            continue
+        if (since and name < since.isoformat()) or (until and name > until.isoformat()):
+            continue
+        days.append(name)
+    return days
+
+
+def _day_files(day: str) -> Iterator[Tuple[str, str]]:
+    """
+    返回某天的 (实例名, 日志文件路径)：先是多实例前的旧布局文件，再按实例名排序
+    """
+    directory = day_dir(day)
+    entries = sorted(os.listdir(directory))
+    for name in entries:
+        if FILE_PATTERN.match(name):
+            yield DEFAULT_INSTANCE, os.path.join(directory, name)
+    for instance in entries:
+        sub = os.path.join(directory, instance)
+        if not os.path.isdir(sub):
+            continue
+        for name in sorted(os.listdir(sub)):
+            if FILE_PATTERN.match(name):
+                yield instance, os.path.join(sub, name)
+
+
+def read_day(day: str) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取某天的原始提交（commit_date 还原为 datetime，缺少 instance 时补为所在目录的实例名）
+    """
+    for instance, path in _day_files(day):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                record.setdefault("instance", instance)
+                if record.get("commit_date"):
+                    record["commit_date"] = datetime.fromisoformat(record["commit_date"])
+                yield record
@@ -0,0 +1,315 @@
+# app/database/migrations.py
+# 版本化数据库迁移：替代 Base.metadata.create_all，按版本号顺序执行 DDL
+
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database.models import engine as default_engine
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _execute_all(conn: Connection, statements: List[str]) -> None:
+    for sql in statements:
+        conn.execute(text(sql))
+
+
+def _m001_initial_schema(conn: Connection) -> None:
+    """
+    基线表结构（与最初 create_all 生成的结构一致，已有库执行时不会重复创建）
+    """
+    _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS commit_records (
+            commit_id VARCHAR(255) NOT NULL,
+            project_id INTEGER NOT NULL,
+            branch VARCHAR(255) NOT NULL,
+            author_name VARCHAR(255) NOT NULL,
+            author_email VARCHAR(255) NOT NULL,
+            com_email VARCHAR(255) NOT NULL,
+            commit_date DATETIME NOT NULL,
+            additions INTEGER NOT NULL,
+            deletions INTEGER NOT NULL,
+            parent_ids VARCHAR(512),
+            PRIMARY KEY (commit_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_commit_records_commit_id ON commit_records (commit_id)",
+    ])
+
+
+def _m002_covering_indexes(conn: Connection) -> None:
+    """
+    看板/导出按时间范围聚合：(commit_date, author_name, additions, deletions) 覆盖索引
+    详情/趋势按作者 + 时间查询：(author_name, commit_date)
+    """
+    _execute_all(conn, [
+        "CREATE INDEX IF NOT EXISTS ix_commit_records_date_author_stats "
+        "ON commit_records (commit_date, author_name, additions, deletions)",
+        "CREATE INDEX IF NOT EXISTS ix_commit_records_author_date "
+        "ON commit_records (author_name, commit_date)",
+    ])
+
+
+def _m003_sync_leases(conn: Connection) -> None:
+    """
+    多进程 / 多节点同步协调用的租约表（每个任务名一行）
+    """
+    _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS sync_leases (
+            name VARCHAR(64) NOT NULL,
+            holder VARCHAR(255),
+            acquired_at DATETIME,
+            heartbeat_at DATETIME,
+            expires_at DATETIME,
+            last_completed_at DATETIME,
+            PRIMARY KEY (name)
+        )
+        """,
+    ])
+
+
+def _m004_sync_jobs(conn: Connection) -> None:
+    """
+    项目级同步任务队列：enqueue 写入，多个 app.worker 进程按可见性超时领取
+    """
+    _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS sync_jobs (
+            id INTEGER NOT NULL,
+            batch_id VARCHAR(64) NOT NULL,
+            project_id INTEGER NOT NULL,
+            project_name VARCHAR(512),
+            since VARCHAR(32) NOT NULL,
+            until VARCHAR(32) NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            worker_id VARCHAR(255),
+            visible_at DATETIME NOT NULL,
+            last_error TEXT,
+            rows_written INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (batch_id, project_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_sync_jobs_status_visible ON sync_jobs (status, visible_at)",
+    ])
+
+
+def _m005_sync_runs(conn: Connection) -> None:
+    """
+    同步执行记录：/sync 返回的 job id 对应一行，记录进度计数（多进程通过增量 UPDATE 累加）
+    """
+    _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            id VARCHAR(32) NOT NULL,
+            trigger VARCHAR(16) NOT NULL,
+            mode VARCHAR(16) NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            message TEXT,
+            batch_id VARCHAR(64),
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME,
+            projects_total INTEGER NOT NULL DEFAULT 0,
+            projects_scanned INTEGER NOT NULL DEFAULT 0,
+            branches_skipped INTEGER NOT NULL DEFAULT 0,
+            api_calls INTEGER NOT NULL DEFAULT 0,
+            retries INTEGER NOT NULL DEFAULT 0,
+            rows_written INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_sync_runs_batch_id ON sync_runs (batch_id)",
+        "CREATE INDEX IF NOT EXISTS ix_sync_runs_status ON sync_runs (status)",
+    ])
+
+
+def _m006_commit_file_stats(conn: Connection) -> None:
+    """
+    逐文件行数（DIFF_STATS_ENABLED 时写入），additions / deletions 为 NULL 表示 GitLab 折叠了该文件的 diff
+    """
+    _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS commit_file_stats (
+            commit_id VARCHAR(255) NOT NULL,
+            path VARCHAR(1024) NOT NULL,
+            additions INTEGER,
+            deletions INTEGER,
+            PRIMARY KEY (commit_id, path)
+        )
+        """,
+    ])
+
+
+def _columns(conn: Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))]
+
+
+def _tables(conn: Connection) -> List[str]:
+    return list(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+
+
+def _m007_gitlab_instances(conn: Connection) -> None:
+    """
+    多 GitLab 实例：commit_records 记录来源实例；sync_jobs 增加 instance 列，
+    唯一约束改为 (batch_id, instance, project_id)（项目 ID 只在实例内唯一）。
+    SQLite 不能修改约束，sync_jobs 通过新建表 + 复制数据重建。
+    每一步先检查是否已完成，旧版本中途中断（DDL 已部分提交）的库可以直接重跑
+    """
+    if "instance" not in _columns(conn, "commit_records"):
+        conn.execute(text("ALTER TABLE commit_records ADD COLUMN instance VARCHAR(64) NOT NULL DEFAULT 'default'"))
+
+    tables = _tables(conn)
+    if "sync_jobs" in tables and "instance" in _columns(conn, "sync_jobs"):
+        conn.execute(text("DROP TABLE IF EXISTS sync_jobs_new"))
+    else:
+        if "sync_jobs" in tables:
+            _execute_all(conn, [
+                "DROP TABLE IF EXISTS sync_jobs_new",
+                """
+                CREATE TABLE sync_jobs_new (
+                    id INTEGER NOT NULL,
+                    batch_id VARCHAR(64) NOT NULL,
+                    instance VARCHAR(64) NOT NULL DEFAULT 'default',
+                    project_id INTEGER NOT NULL,
+                    project_name VARCHAR(512),
+                    since VARCHAR(32) NOT NULL,
+                    until VARCHAR(32) NOT NULL,
+                    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    worker_id VARCHAR(255),
+                    visible_at DATETIME NOT NULL,
+                    last_error TEXT,
+                    rows_written INTEGER NOT NULL DEFAULT 0,
+                    created_at DATETIME NOT NULL,
+                    updated_at DATETIME NOT NULL,
+                    PRIMARY KEY (id),
+                    UNIQUE (batch_id, instance, project_id)
+                )
+                """,
+                """
+                INSERT INTO sync_jobs_new (
+                    id, batch_id, project_id, project_name, since, until, status, attempts, max_attempts,
+                    worker_id, visible_at, last_error, rows_written, created_at, updated_at
+                )
+                SELECT id, batch_id, project_id, project_name, since, until, status, attempts, max_attempts,
+                       worker_id, visible_at, last_error, rows_written, created_at, updated_at
+                FROM sync_jobs
+                """,
+                "DROP TABLE sync_jobs",
+            ])
+        # 旧版本在 DROP 之后、RENAME 之前中断时只剩 sync_jobs_new
+        conn.execute(text("ALTER TABLE sync_jobs_new RENAME TO sync_jobs"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sync_jobs_status_visible ON sync_jobs (status, visible_at)"))
+
+
+# 新的迁移只能追加在末尾，已发布的版本不要修改
+MIGRATIONS: List[Migration] = [
+    Migration(1, "初始表结构 commit_records", _m001_initial_schema),
+    Migration(2, "commit_records 覆盖索引", _m002_covering_indexes),
+    Migration(3, "同步租约表 sync_leases", _m003_sync_leases),
+    Migration(4, "同步任务队列 sync_jobs", _m004_sync_jobs),
+    Migration(5, "同步执行记录 sync_runs", _m005_sync_runs),
+    Migration(6, "逐文件行数 commit_file_stats", _m006_commit_file_stats),
+    Migration(7, "多 GitLab 实例：commit_records.instance / sync_jobs.instance", _m007_gitlab_instances),
+]
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER NOT NULL PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+        """
+    ))
+
+
+@contextmanager
+def _write_locked(bind: Engine) -> Iterator[Connection]:
+    """
+    在 BEGIN IMMEDIATE 事务中执行（获取数据库写锁，其他进程的迁移在此等待）
+    pysqlite 默认不为 DDL 开启事务，bind.begin() 中的 ALTER / CREATE / DROP 会各自提交；
+    连接切换为 AUTOCOMMIT 后由这里显式 BEGIN / COMMIT，DDL 与版本记录在同一事务中提交或回滚
+    """
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+
+def _applied_version(conn: Connection) -> int:
+    _ensure_version_table(conn)
+    return conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar() or 0
+
+
+def current_version(bind: Engine = None) -> int:
+    """
+    返回数据库当前已应用的最高迁移版本（未初始化时为 0）
+    """
+    bind = bind or default_engine
+    with bind.begin() as conn:
+        return _applied_version(conn)
+
+
+def run_migrations(bind: Engine = None) -> int:
+    """
+    依次执行所有未应用的迁移，每个版本在独立的写锁事务中完成：
+    持锁后重新读取版本号，多进程同时启动时只有一个进程执行某个版本，其他进程等锁后跳过
+    返回: 执行后的版本号
+    """
+    bind = bind or default_engine
+    version = current_version(bind)
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with _write_locked(bind) as conn:
+            version = _applied_version(conn)
+            if migration.version <= version:
+                continue
+            migration.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.now(),
+                }
+            )
+        logger.info("✅ 已应用数据库迁移 %03d: %s", migration.version, migration.description)
+        version = migration.version
+
+    return version
+
+
+if __name__ == "__main__":
+    setup_logging()
+    logger.info("✅ 数据库当前版本: %s", run_migrations())
@@ -1,9 +1,9 @@
 # app/database/models.py
 
-from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Index, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import create_engine  # 新增：在 models.py 中创建 engine
-from app.config import config
+from app.config import config, DEFAULT_INSTANCE
 
 engine = create_engine(config.DATABASE_URL, connect_args={"check_same_thread": False})  # 新增：创建 engine
 
@@ -15,6 +15,11 @@ class CommitRecord(Base):
     提交记录表
     """
     __tablename__ = "commit_records"
+    # 表结构与索引由 app/database/migrations.py 维护，这里的声明需与迁移保持一致
+    __table_args__ = (
+        Index("ix_commit_records_date_author_stats", "commit_date", "author_name", "additions", "deletions"),
+        Index("ix_commit_records_author_date", "author_name", "commit_date"),
+    )
 
     commit_id = Column(String(255), primary_key=True, index=True, nullable=False)  # GitLab commit hash
     project_id = Column(Integer, nullable=False)  # GitLab 项目 ID
@@ -26,6 +31,97 @@ class CommitRecord(Base):
     additions = Column(Integer, nullable=False)  # 新增行数
     deletions = Column(Integer, nullable=False)  # 删除行数
     parent_ids = Column(String(512))  # 父提交 ID 列表（JSON 字符串存储）
+    instance = Column(String(64), nullable=False, default=DEFAULT_INSTANCE)  # 来源 GitLab 实例（多实例时取优先级最高的）
 
     def __repr__(self):
         return f"<CommitRecord({self.commit_id[:8]}..., author={self.author_name}, +{self.additions}, -{self.deletions})>"
+
+
+class SyncLease(Base):
+    """
+    同步租约表：保证同一时刻只有一个进程 / 节点执行同名同步任务
+    """
+    __tablename__ = "sync_leases"
+
+    name = Column(String(64), primary_key=True)  # 任务名
+    holder = Column(String(255))  # 当前持有者（主机名:进程号:随机后缀），空表示未被持有
+    acquired_at = Column(DateTime)  # 获取时间
+    heartbeat_at = Column(DateTime)  # 最近一次心跳时间
+    expires_at = Column(DateTime)  # 过期时间，持有者宕机后超过该时间可被其他进程接管
+    last_completed_at = Column(DateTime)  # 最近一次成功完成时间
+
+    def __repr__(self):
+        return f"<SyncLease({self.name}, holder={self.holder}, expires_at={self.expires_at})>"
+
+
+class SyncJob(Base):
+    """
+    项目级同步任务（分布式同步的任务队列）
+    status: pending（待领取 / 等待重试） -> running（已领取，visible_at 前不可被他人领取） -> done / failed
+    """
+    __tablename__ = "sync_jobs"
+    __table_args__ = (
+        UniqueConstraint("batch_id", "instance", "project_id"),
+        Index("ix_sync_jobs_status_visible", "status", "visible_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String(64), nullable=False)  # 批次号，同一批次内每个实例的每个项目只有一个任务
+    instance = Column(String(64), nullable=False, default=DEFAULT_INSTANCE)  # GitLab 实例名
+    project_id = Column(Integer, nullable=False)  # GitLab 项目 ID（仅在实例内唯一）
+    project_name = Column(String(512))  # 项目路径（仅用于日志）
+    since = Column(String(32), nullable=False)  # 查询起始时间（GitLab API 格式）
+    until = Column(String(32), nullable=False)  # 查询结束时间
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)  # 已领取次数
+    max_attempts = Column(Integer, nullable=False, default=3)
+    worker_id = Column(String(255))  # 最近一次领取的 worker
+    visible_at = Column(DateTime, nullable=False)  # 该时间之后可被（重新）领取
+    last_error = Column(Text)
+    rows_written = Column(Integer, nullable=False, default=0)  # 写入 commit_records 的新行数
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SyncJob({self.id}, project={self.project_id}, status={self.status}, attempts={self.attempts})>"
+
+
+class SyncRun(Base):
+    """
+    同步执行记录：/sync 返回的 job id，/sync/{id} 查询进度
+    status: queued -> running -> success / failed / skipped
+    """
+    __tablename__ = "sync_runs"
+
+    id = Column(String(32), primary_key=True)
+    trigger = Column(String(16), nullable=False)  # manual / schedule / startup
+    mode = Column(String(16), nullable=False)  # local / queue
+    status = Column(String(16), nullable=False, index=True)
+    message = Column(Text)
+    batch_id = Column(String(64), index=True)  # queue 模式下对应的 sync_jobs 批次
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    projects_total = Column(Integer, nullable=False, default=0)  # 待扫描项目数
+    projects_scanned = Column(Integer, nullable=False, default=0)  # 已扫描项目数
+    branches_skipped = Column(Integer, nullable=False, default=0)  # 无提交或拉取失败而跳过的分支数
+    api_calls = Column(Integer, nullable=False, default=0)  # GitLab API 调用次数
+    retries = Column(Integer, nullable=False, default=0)  # GitLab API 重试次数
+    rows_written = Column(Integer, nullable=False, default=0)  # 写入 commit_records 的新行数
+
+    def __repr__(self):
+        return f"<SyncRun({self.id}, status={self.status}, rows_written={self.rows_written})>"
+
+
+class CommitFileStat(Base):
+    """
+    提交的逐文件行数（DIFF_STATS_ENABLED 时写入，记录原始行数，排除规则在计算提交行数时应用）
+    """
+    __tablename__ = "commit_file_stats"
+
+    commit_id = Column(String(255), primary_key=True)
+    path = Column(String(1024), primary_key=True)
+    additions = Column(Integer)  # NULL 表示 GitLab 折叠了该文件的 diff，行数未知
+    deletions = Column(Integer)
+
+    def __repr__(self):
+        return f"<CommitFileStat({self.commit_id[:8]}..., {self.path}, +{self.additions}, -{self.deletions})>"
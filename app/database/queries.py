@@ -0,0 +1,55 @@
+# app/database/queries.py
+# 看板 / 导出 / 趋势共用的查询语句（同时供 query_plans 做执行计划检查）
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from app.database.models import CommitRecord
+
+
+def author_totals_stmt(since: datetime = None, until: datetime = None) -> Select:
+    """
+    按作者聚合时间范围内的 additions / deletions
+    走 (commit_date, author_name, additions, deletions) 覆盖索引
+    未指定 since 时以 datetime.min 作为下界：始终是有界范围，
+    否则规划器会为了 GROUP BY 改走 (author_name, commit_date) 索引并逐行回表
+    """
+    stmt = select(
+        CommitRecord.author_name,
+        func.sum(CommitRecord.additions).label("additions"),
+        func.sum(CommitRecord.deletions).label("deletions")
+    ).group_by(CommitRecord.author_name)
+
+    stmt = stmt.where(CommitRecord.commit_date >= (since or datetime.min))
+    if until:
+        stmt = stmt.where(CommitRecord.commit_date <= until)
+    return stmt
+
+
+def author_exists_stmt(author: str) -> Select:
+    """
+    判断作者是否有提交记录，走 (author_name, commit_date) 索引
+    """
+    return select(CommitRecord.author_name).where(CommitRecord.author_name == author).limit(1)
+
+
+def daily_trend_stmt(author: str, since: date, until: date) -> Select:
+    """
+    按日期聚合某个作者的 additions / deletions（since、until 均为包含的自然日）
+    直接对 commit_date 做范围过滤，不在 WHERE 中使用 date()，保证能走 (author_name, commit_date) 索引
+    """
+    day = func.date(CommitRecord.commit_date)
+    return (
+        select(
+            day.label("commit_date"),
+            func.sum(CommitRecord.additions).label("additions"),
+            func.sum(CommitRecord.deletions).label("deletions")
+        )
+        .where(CommitRecord.author_name == author)
+        .where(CommitRecord.commit_date >= datetime.combine(since, datetime.min.time()))
+        .where(CommitRecord.commit_date < datetime.combine(until + timedelta(days=1), datetime.min.time()))
+        .group_by(day)
+        .order_by(day)
+    )
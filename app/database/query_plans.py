@@ -0,0 +1,86 @@
+# app/database/query_plans.py
+# 执行计划回归检查：对看板 / 导出 / 趋势查询执行 EXPLAIN QUERY PLAN，
+# 一旦任何查询退化为对 commit_records 的全表扫描即失败
+#
+# 用法：
+#   python -m app.database.query_plans              # 在内存库上按迁移建表后检查
+#   python -m app.database.query_plans --current    # 检查 config.DATABASE_URL 指向的库
+
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from app.database.migrations import run_migrations
+from app.database.queries import author_totals_stmt, author_exists_stmt, daily_trend_stmt
+
+# "SCAN commit_records" / "SCAN TABLE commit_records"（旧版本 SQLite）
+# 以及 "SCAN commit_records USING COVERING INDEX ..."（整条索引扫描）都视为全表扫描
+FULL_SCAN_PATTERN = re.compile(r"\bSCAN (TABLE )?commit_records\b")
+
+
+def checked_queries() -> Dict[str, Select]:
+    """
+    需要保证走索引的查询（与 app.main 中各接口的真实查询一致）
+    """
+    yesterday = date.today() - timedelta(days=1)
+    since = datetime.combine(yesterday - timedelta(days=6), datetime.min.time())
+    until = datetime.combine(yesterday, datetime.max.time())
+    return {
+        "dashboard/export: 时间范围聚合": author_totals_stmt(since, until),
+        "dashboard/export: 仅结束时间": author_totals_stmt(None, until),
+        "detail: 作者是否存在": author_exists_stmt("张三"),
+        "trends: 作者每日趋势": daily_trend_stmt("张三", since.date(), yesterday),
+    }
+
+
+def explain(bind: Engine, stmt: Select) -> List[str]:
+    """
+    返回查询的 EXPLAIN QUERY PLAN 明细（每个节点一行）
+    """
+    compiled = stmt.compile(dialect=bind.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with bind.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def find_full_scans(bind: Engine) -> Dict[str, List[str]]:
+    """
+    返回退化为全表扫描的查询及其执行计划；全部走索引时返回空字典
+    """
+    failures = {}
+    for name, stmt in checked_queries().items():
+        plan = explain(bind, stmt)
+        if any(FULL_SCAN_PATTERN.search(detail) for detail in plan):
+            failures[name] = plan
+    return failures
+
+
+def main(argv: List[str]) -> int:
+    if "--current" in argv:
+        from app.database.models import engine as bind
+    else:
+        bind = create_engine("sqlite://")
+    run_migrations(bind)
+
+    failures = find_full_scans(bind)
+    for name, stmt in checked_queries().items():
+        status = "❌" if name in failures else "✅"
+        print(f"{status} {name}")
+        for detail in explain(bind, stmt):
+            print(f"      {detail}")
+
+    if failures:
+        print(f"❌ {len(failures)} 个查询退化为全表扫描")
+        return 1
+    print("✅ 所有查询均走索引")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
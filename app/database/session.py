@@ -1,14 +1,38 @@
 # app/database/session.py
 # 数据库会话管理
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.config import config
 from app.database.models import engine
 
-# 创建会话工厂
+# 创建会话工厂（同步：数据同步、归档等后台任务使用）
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def async_database_url() -> str:
+    """
+    异步引擎地址：优先使用 ASYNC_DATABASE_URL，否则将 DATABASE_URL 的驱动替换为 aiosqlite
+    """
+    if config.ASYNC_DATABASE_URL:
+        return config.ASYNC_DATABASE_URL
+    return config.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+# 异步会话工厂（HTTP 接口使用，不占用 Starlette 线程池）
+# 首次请求时才创建：sqlalchemy.ext.asyncio / aiosqlite 不拖慢应用启动，只跑同步任务的进程也不加载
+_async_session_factory = None
+
+
+def async_session_factory():
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+        engine = create_async_engine(async_database_url())
+        _async_session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    return _async_session_factory
+
+
 def get_db():
     """
     FastAPI 依赖项：获取数据库会话
@@ -21,3 +45,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    FastAPI 依赖项：获取异步数据库会话
+    使用方式：
+        db: AsyncSession = Depends(get_async_db)
+        result = (await db.execute(stmt)).all()
+    """
+    async with async_session_factory()() as db:
+        yield db
@@ -1,31 +1,39 @@
-import uvicorn
 from fastapi import FastAPI, Request, Depends, Query
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from pandas.core._numba import executor
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from apscheduler.schedulers.background import BackgroundScheduler
 from starlette.responses import RedirectResponse
 from fastapi import HTTPException
 
-from app.services.sync_service import sync_yesterday_commits
-from app.database.models import CommitRecord
-from app.database.session import get_db
-from sqlalchemy import func
+from app.config import config
+from app.metrics import HTTP_LATENCY, HTTP_REQUESTS, render_metrics
+from app.profiling import ProfilingMiddleware, phase
+# 数据库 / 同步相关模块（SQLAlchemy、GitLab 客户端等）在接口或定时任务首次使用时才导入，
+# 应用启动与 /health 不等待它们加载
+from app.utils.concurrency import run_blocking
+from app.utils.logger import setup_logging
+from app.utils.table_loader import iter_records, load_cached
 from datetime import datetime, timedelta, date
 import atexit
+import concurrent.futures
+import logging
+import threading
+import time
 import asyncio
 import os
-from fastapi.responses import Response
+from fastapi.responses import Response, PlainTextResponse
 import csv
 from io import StringIO
-import pandas as pd
-from pytz import timezone
 import re
+from functools import partial
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="GitLab 提交统计服务")
 
+# 开启后每个请求返回 Server-Timing 头，并按抽样 / 请求头采集 profile
+if config.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # ================================
 # 📁 挂载静态文件和模板
 # ================================
@@ -36,18 +44,76 @@ templates_dir = os.path.join(current_dir, "templates")
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 templates = Jinja2Templates(directory=templates_dir)
 
-scheduler = BackgroundScheduler()
+# 定时任务调度器在 startup 时才创建（apscheduler / pytz 延迟导入）
+scheduler = None
+
+# 数据库迁移在 startup 时提交到线程池执行一次，读写数据库的接口先等待它完成
+_migrations: concurrent.futures.Future = None
+_migrations_lock = threading.Lock()
+
+
+def _run_migrations() -> None:
+    from app.database.migrations import run_migrations
+
+    run_migrations()
+
+
+def start_migrations() -> concurrent.futures.Future:
+    """
+    提交数据库迁移（每个进程只执行一次），返回表示迁移结果的 Future
+    未经过 startup 事件（如测试直接调用接口）时由首个访问数据库的请求触发
+    """
+    global _migrations
+    with _migrations_lock:
+        if _migrations is None:
+            executor = concurrent.futures.ThreadPoolExecutor(1, "migrations")
+            _migrations = executor.submit(_run_migrations)
+            executor.shutdown(wait=False)
+            _migrations.add_done_callback(_log_migrations)
+        return _migrations
+
+
+def _log_migrations(future: concurrent.futures.Future) -> None:
+    if future.exception() is not None:
+        logger.error("❌ 数据库迁移失败: %s", future.exception())
+
+
+def _migration_error() -> HTTPException:
+    return HTTPException(status_code=503, detail="数据库迁移失败，请查看服务日志")
+
+
+def wait_for_migrations() -> None:
+    try:
+        start_migrations().result()
+    except Exception:
+        raise _migration_error()
+
+
+async def get_db():
+    """
+    接口的数据库会话依赖（同 app.database.session.get_async_db），首次请求时才导入会话模块、创建异步引擎
+    接口中的 db 参数不标注 AsyncSession，避免导入时加载 sqlalchemy.ext.asyncio
+    """
+    from app.database.session import async_session_factory
+
+    try:
+        await asyncio.wrap_future(start_migrations())
+    except Exception:
+        raise _migration_error()
+
+    async with async_session_factory()() as db:
+        yield db
 
 
 @app.get("/")
-def dashboard(
+async def dashboard(
         request: Request,
         days: int = Query(None),
         start_date: str = Query(None),
         end_date: str = Query(None),
         search: str = Query(None),
         page: int = Query(1, ge=1),
-        db: Session = Depends(get_db)
+        db=Depends(get_db)
 ):
     # 1. 确定时间范围
     if days is not None:
@@ -74,19 +140,12 @@ def dashboard(
         else:
             until = datetime.now()
 
-    # 2. 查询有提交记录的人
-    query = db.query(
-        CommitRecord.author_name,
-        func.sum(CommitRecord.additions).label("additions"),
-        func.sum(CommitRecord.deletions).label("deletions")
-    ).group_by(CommitRecord.author_name)
-
-    if since:
-        query = query.filter(CommitRecord.commit_date >= since)
-    if until:
-        query = query.filter(CommitRecord.commit_date <= until)
+    from app.database.archive import merge_archived_author_totals
+    from app.database.queries import author_totals_stmt
 
-    result = query.all()
+    # 2. 查询有提交记录的人
+    with phase("db"):
+        result = (await db.execute(author_totals_stmt(since, until))).all()
 
     # 转成字典：author_name -> {additions, deletions}
     commit_data = {
@@ -96,16 +155,20 @@ def dashboard(
         }
         for row in result
     }
+    # 合并冷数据归档（范围不涉及归档分区时不会读取任何文件）
+    with phase("archive"):
+        await run_blocking(merge_archived_author_totals, commit_data, since, until)
 
     # 3. 读取 Excel 中的所有员工（含部门）
-    all_employees = load_all_employees()
+    with phase("employees"):
+        all_employees = await run_blocking(load_all_employees)
 
     # 4. 搜索过滤（按姓名）
     if search:
         # all_employees = [e for e in all_employees if search in search_names]
         search_terms = re.split(r'[,;\s\n]+', search)
         search_terms = [s.strip() for s in search_terms if s.strip()]
-        print(f"🔍 模糊搜索关键词: {search_terms}")
+        logger.debug("🔍 模糊搜索关键词: %s", search_terms)
 
         # 模糊匹配：名字中包含任意一个关键词
         all_employees = [
@@ -113,26 +176,27 @@ def dashboard(
             if any(term in e["name"] for term in search_terms)
         ]
 
-    # 5. 合并数据：所有人 + 补 0
-    full_data = []
-    for emp in all_employees:
-        name = emp["name"]
-        if name in commit_data:
-            add = commit_data[name]["additions"]
-            dels = commit_data[name]["deletions"]
-        else:
-            add, dels = 0, 0
-
-        full_data.append({
-            "author_name": name,
-            "department": emp["department"],
-            "additions": add,
-            "deletions": dels,
-            "net_lines": add - dels
-        })
-
-    # 6. 按新增行数排序
-    full_data.sort(key=lambda x: x["additions"], reverse=True)
+    with phase("merge"):
+        # 5. 合并数据：所有人 + 补 0
+        full_data = []
+        for emp in all_employees:
+            name = emp["name"]
+            if name in commit_data:
+                add = commit_data[name]["additions"]
+                dels = commit_data[name]["deletions"]
+            else:
+                add, dels = 0, 0
+
+            full_data.append({
+                "author_name": name,
+                "department": emp["department"],
+                "additions": add,
+                "deletions": dels,
+                "net_lines": add - dels
+            })
+
+        # 6. 按新增行数排序
+        full_data.sort(key=lambda x: x["additions"], reverse=True)
 
     # 7. 分页
     total = len(full_data)
@@ -161,30 +225,32 @@ def dashboard(
     # ✅ 正常分页
     data = full_data[start_idx:end_idx]
 
-    return templates.TemplateResponse(
-        "dashboard.html",
-        context={
-            "request": request,
-            "data": data,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "max_page": max_page,
-            "search": search or "",
-            "days": days,
-            "start_date": start_date,
-            "end_date": end_date,
-        }
-    )
+    with phase("render"):
+        response = templates.TemplateResponse(
+            "dashboard.html",
+            context={
+                "request": request,
+                "data": data,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "max_page": max_page,
+                "search": search or "",
+                "days": days,
+                "start_date": start_date,
+                "end_date": end_date,
+            }
+        )
+    return response
 
 
 @app.get("/export")
-def export_data(
+async def export_data(
         days: int = Query(None),
         start_date: str = Query(None),
         end_date: str = Query(None),
         search: str = Query(None),
-        db: Session = Depends(get_db)
+        db=Depends(get_db)
 ):
     # 时间范围
     if days is not None:
@@ -198,19 +264,12 @@ def export_data(
         end_str = until.strftime("%m%d")
         data_range = f"{start_str}_{end_str}"
 
+    from app.database.archive import merge_archived_author_totals
+    from app.database.queries import author_totals_stmt
+
     # 1. 查询有提交的人
-    query = db.query(
-        CommitRecord.author_name,
-        func.sum(CommitRecord.additions).label("additions"),
-        func.sum(CommitRecord.deletions).label("deletions")
-    ).group_by(CommitRecord.author_name)
-
-    if since:
-        query = query.filter(CommitRecord.commit_date >= since)
-    if until:
-        query = query.filter(CommitRecord.commit_date <= until)
-
-    result = query.all()
+    with phase("db"):
+        result = (await db.execute(author_totals_stmt(since, until))).all()
     commit_data = {
         row.author_name: {
             "additions": int(row.additions),
@@ -218,50 +277,56 @@ def export_data(
         }
         for row in result
     }
+    # 合并冷数据归档（范围不涉及归档分区时不会读取任何文件）
+    with phase("archive"):
+        await run_blocking(merge_archived_author_totals, commit_data, since, until)
 
     # 2. 读取所有员工（含部门）
-    all_employees = load_all_employees()
+    with phase("employees"):
+        all_employees = await run_blocking(load_all_employees)
     if search:
         all_employees = [e for e in all_employees if search in e["name"]]
     # 3. 合并数据
 
-    full_data = []
-    for emp in all_employees:
-        name = emp["name"]
-        if name in commit_data:
-            add = commit_data[name]["additions"]
-            dels = commit_data[name]["deletions"]
-        else:
-            add, dels = 0, 0
-
-        full_data.append({
-            "author_name": name,
-            "department": emp["department"],
-            "additions": add,
-            "deletions": dels,
-            "net_lines": add - dels
-        })
-
-    # 4. 排序
-    full_data.sort(key=lambda x: x["additions"], reverse=True)
-
-    # 5. 生成 CSV
-    si = StringIO()
-    writer = csv.writer(si, quoting=csv.QUOTE_ALL)
-    writer.writerow(["排名", "姓名", "部门", "新增行数", "删除行数", "净增行数"])  # ✅ 含部门
-
-    for idx, row in enumerate(full_data, start=1):
-        writer.writerow([
-            idx,
-            row["author_name"],
-            row["department"],
-            row["additions"],
-            row["deletions"],
-            row["net_lines"]
-        ])
-
-    content = si.getvalue()
-    si.close()
+    with phase("merge"):
+        full_data = []
+        for emp in all_employees:
+            name = emp["name"]
+            if name in commit_data:
+                add = commit_data[name]["additions"]
+                dels = commit_data[name]["deletions"]
+            else:
+                add, dels = 0, 0
+
+            full_data.append({
+                "author_name": name,
+                "department": emp["department"],
+                "additions": add,
+                "deletions": dels,
+                "net_lines": add - dels
+            })
+
+        # 4. 排序
+        full_data.sort(key=lambda x: x["additions"], reverse=True)
+
+    with phase("csv"):
+        # 5. 生成 CSV
+        si = StringIO()
+        writer = csv.writer(si, quoting=csv.QUOTE_ALL)
+        writer.writerow(["排名", "姓名", "部门", "新增行数", "删除行数", "净增行数"])  # ✅ 含部门
+
+        for idx, row in enumerate(full_data, start=1):
+            writer.writerow([
+                idx,
+                row["author_name"],
+                row["department"],
+                row["additions"],
+                row["deletions"],
+                row["net_lines"]
+            ])
+
+        content = si.getvalue()
+        si.close()
 
     today = datetime.now().strftime("%m%d")
     filename = f"{data_range}.csv"
@@ -274,13 +339,13 @@ def export_data(
 
 
 @app.get("/detail")
-def detail_page(
+async def detail_page(
     request: Request,
     author: str = Query(..., description="开发者姓名"),
     days: int = Query(None, ge=1, le=180),
     start_date: str = Query(None),
     end_date: str = Query(None),
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
     """
     渲染开发者详情页面
@@ -289,13 +354,15 @@ def detail_page(
     if not author:
         raise HTTPException(status_code=400, detail="缺少 author 参数")
 
+    from app.database.queries import author_exists_stmt
+
     # 检查作者是否存在
-    exists = db.query(CommitRecord.author_name).filter(
-        CommitRecord.author_name == author
-    ).first()
+    with phase("db"):
+        exists = (await db.execute(author_exists_stmt(author))).first()
     if not exists:
         # 尝试从员工列表中查找（允许查无记录者）
-        employees = load_all_employees()
+        with phase("employees"):
+            employees = await run_blocking(load_all_employees)
         if not any(e["name"] == author for e in employees):
             raise HTTPException(status_code=404, detail="未找到该开发者")
 
@@ -333,12 +400,12 @@ def detail_page(
 
 
 @app.get("/api/trends")
-def get_trends(
+async def get_trends(
     author: str = Query(..., description="开发者姓名"),
     days: int = Query(None, ge=1, le=180),
     start_date: str = Query(None),
     end_date: str = Query(None),
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
     """
     返回开发者每日提交趋势数据（JSON）
@@ -363,20 +430,12 @@ def get_trends(
     if (until - since).days > 180:
         raise HTTPException(status_code=400, detail="时间范围不能超过180天")
 
+    from app.database.archive import archived_daily_trend
+    from app.database.queries import daily_trend_stmt
+
     # 数据库查询：按日期聚合 additions 和 deletions
-    result = (
-        db.query(
-            func.date(CommitRecord.commit_date).label("commit_date"),
-            func.sum(CommitRecord.additions).label("additions"),
-            func.sum(CommitRecord.deletions).label("deletions")
-        )
-        .filter(CommitRecord.author_name == author)
-        .filter(func.date(CommitRecord.commit_date) >= since)
-        .filter(func.date(CommitRecord.commit_date) <= until)
-        .group_by(func.date(CommitRecord.commit_date))
-        .order_by(func.date(CommitRecord.commit_date))
-        .all()
-    )
+    with phase("db"):
+        result = (await db.execute(daily_trend_stmt(author, since, until))).all()
 
     # 转换为字典列表，确保日期连续（可选：补零）
     dates = []
@@ -384,20 +443,23 @@ def get_trends(
     dels = []
 
     current = since
-    print(current)
     result_dict = {
-        datetime.strptime(r.commit_date, "%Y-%m-%d").date(): r
+        datetime.strptime(r.commit_date, "%Y-%m-%d").date(): (int(r.additions), int(r.deletions))
         for r in result
         if r.commit_date is not None
     }
-    print(result_dict)
+    # 合并冷数据归档中的每日数据
+    with phase("archive"):
+        archived = await run_blocking(archived_daily_trend, author, since, until)
+    for day, (day_adds, day_dels) in archived.items():
+        hot_adds, hot_dels = result_dict.get(day, (0, 0))
+        result_dict[day] = (hot_adds + day_adds, hot_dels + day_dels)
 
     while current <= until:
         if current in result_dict:
             row = result_dict[current]
-            print(row)
-            adds.append(int(row.additions))
-            dels.append(int(row.deletions))
+            adds.append(row[0])
+            dels.append(row[1])
         else:
             adds.append(0)
             dels.append(0)
@@ -410,87 +472,186 @@ def get_trends(
         "deletions": dels
     }
 
-    print(additions)
-
 
 @app.post("/sync")
 def trigger_sync():
-    sync_yesterday_commits()
-    return {"status": "success", "message": "数据同步任务已执行"}
+    """
+    立即返回 job id，同步在后台线程中执行，通过 /sync/{job_id} 查询进度
+    租约在返回前获取并交给后台线程：所有 GitLab 实例都已有其他请求 / worker / 节点在同步时
+    直接返回正在执行的 job id，并发请求不会各自拿到一个随后被跳过的 job id
+    """
+    from app.services.sync_progress import create_run, latest_active_run
+    from app.services.sync_service import acquire_leases, instance_names
+
+    wait_for_migrations()
+    leases, _ = acquire_leases(instance_names())
+    if not leases:
+        return {"status": "running", "job_id": latest_active_run(), "message": "数据同步正在进行中"}
+
+    try:
+        run_id = create_run("manual", config.SYNC_MODE)
+        threading.Thread(target=run_manual_sync, args=(run_id, leases), name=f"sync-{run_id[:8]}", daemon=True).start()
+    except Exception:
+        for lease in leases.values():
+            lease.release()
+        raise
+    return {"status": "queued", "job_id": run_id, "message": "数据同步任务已提交"}
+
+
+@app.get("/sync/{job_id}")
+def sync_status(job_id: str):
+    """
+    查询同步进度：已扫描项目数、跳过分支数、API 调用与重试次数、写入行数
+    queue 模式下额外返回批次内各状态的任务数
+    """
+    from app.services.sync_progress import get_run
+
+    wait_for_migrations()
+    run = get_run(job_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="未找到该同步任务")
+    return run
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """
+    记录每个接口的请求数与耗时（按路由模板聚合，避免查询参数导致标签爆炸）
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method, route=path)
+        HTTP_REQUESTS.inc(method=request.method, route=path, status=status)
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
 
 
 def start_scheduler():
-    # 添加每天 8:00 执行的任务
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from pytz import timezone
+    from app.services.archive_service import archive_cold_commits
+    from app.services.sync_service import sync_yesterday_commits
+
+    global scheduler
+    scheduler = BackgroundScheduler()
+    # 每个 GitLab 实例按自己的 schedule 同步；同一时间的实例合并为一个任务，在一次同步中并行拉取
+    schedules = {}
+    for instance in config.gitlab_instances():
+        schedules.setdefault(instance.schedule, []).append(instance.name)
+    for at, names in sorted(schedules.items()):
+        hour, minute = (int(part) for part in at.split(":"))
+        scheduler.add_job(
+            func=partial(sync_yesterday_commits, instances=names),
+            trigger="cron",
+            hour=hour,
+            minute=minute,
+            timezone=timezone("Asia/Shanghai"),
+            # 只有一个同步时间时沿用原来的任务 id
+            id="daily_sync" if len(schedules) == 1 else f"daily_sync_{hour:02d}{minute:02d}",
+            name=f"每日 GitLab 提交同步（{', '.join(names)}）",
+            replace_existing=True,
+            misfire_grace_time=60,  # ✅ 容忍 60 秒延迟
+            max_instances=1,  # ✅ 防止并发
+            coalesce=True  # ✅ 错过多此只执行一次
+        )
+    # 每天 03:00 将超过保留期的提交移入 Parquet 归档
     scheduler.add_job(
-        func=sync_yesterday_commits,
+        func=archive_cold_commits,
         trigger="cron",
-        hour=8,
+        hour=3,
         minute=0,
         timezone=timezone("Asia/Shanghai"),
-        id="daily_sync",
-        name="每日 GitLab 提交同步",
+        id="daily_archive",
+        name="每日冷数据归档",
         replace_existing=True,
-        misfire_grace_time=60,  # ✅ 容忍 60 秒延迟
-        max_instances=1,  # ✅ 防止并发
-        coalesce=True  # ✅ 错过多此只执行一次
+        misfire_grace_time=600,
+        max_instances=1,
+        coalesce=True
     )
     scheduler.start()
-    print("✅ 定时任务已启动：每天 08:00 同步昨日提交")
+    logger.info("✅ 定时任务已启动：每天 %s 同步昨日提交，03:00 归档冷数据", "、".join(
+        f"{at} [{', '.join(names)}]" for at, names in sorted(schedules.items())
+    ))
     atexit.register(lambda: scheduler.shutdown())
 
 
 async def async_trigger_sync():
-    print("⏰ [Scheduler] 正在提交 sync_yesterday_commits 到后台线程...")
+    from app.services.sync_service import sync_yesterday_commits
+
+    logger.info("⏰ [Scheduler] 正在提交 sync_yesterday_commits 到后台线程...")
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(executor, sync_yesterday_commits)
-    print("⏰ [Scheduler] sync_yesterday_commits 提交完成")
+    await loop.run_in_executor(None, sync_yesterday_commits)
+    logger.info("⏰ [Scheduler] sync_yesterday_commits 提交完成")
 
 
 # ================================
 # ✅ 异步执行同步任务的包装函数
 # ================================
+def run_manual_sync(run_id: str, leases: dict):
+    from app.services.sync_service import sync_yesterday_commits
+
+    try:
+        sync_yesterday_commits(force=True, run_id=run_id, trigger="manual", leases=leases)
+    except Exception as e:
+        logger.error("❌ 数据同步任务失败: %s", e)
+
+
 async def run_sync_in_background():
-    print("🔄 开始执行数据同步任务...")
+    from app.services.sync_service import sync_yesterday_commits
+
+    logger.info("🔄 开始执行数据同步任务...")
     try:
         sync_yesterday_commits()
-        print("✅ 数据同步任务完成")
+        logger.info("✅ 数据同步任务完成")
     except Exception as e:
-        print(f"❌ 数据同步任务失败: {e}")
+        logger.error("❌ 数据同步任务失败: %s", e)
 
 
 # 添加读取excel的函数
-EMPLOYEES_FILE = os.path.join(os.path.dirname(__file__), "employee.xlsx")
+EMPLOYEES_FILE = config.EMPLOYEES_FILE
+
+
+def parse_employees(path: str) -> list:
+    """
+    逐行读取员工名单（姓名、部门两列），跳过姓名为空的行
+    """
+    employees = []
+    for row in iter_records(path, ("姓名", "部门")):
+        name = row.get("姓名")
+        if name is None:
+            continue
+        dept = row.get("部门")
+        employees.append({"name": str(name), "department": str(dept) if dept is not None else ""})
+
+    logger.info("✅ 成功加载 %d 名员工", len(employees))
+    return employees
 
 
 def load_all_employees() -> list:
     """
-        从 Excel 文件读取所有员工：姓名 + 部门
+        从 Excel 文件读取所有员工：姓名 + 部门（文件未变化时直接返回缓存，调用方不要修改）
         返回: [{"name": "张三", "department": "后端组"}, ...]
         """
     try:
-        df = pd.read_excel(EMPLOYEES_FILE)
-        df.columns = df.columns.str.strip()  # 清理列名空格
-
-        if "姓名" not in df.columns or "部门" not in df.columns:
-            raise ValueError("Excel 文件必须包含 '姓名' 和 '部门' 列")
-
-        employees = []
-        for _, row in df.iterrows():
-            name = str(row["姓名"]).strip()
-            dept = str(row["部门"]).strip()
-            if name:
-                employees.append({"name": name, "department": dept})
-
-        print(f"✅ 成功加载 {len(employees)} 名员工: {employees}")
-        return employees
+        return load_cached(EMPLOYEES_FILE, parse_employees)
 
     except Exception as e:
-        print(f"❌ 读取 employees.xlsx 失败: {e}")
+        logger.error("❌ 读取 employees.xlsx 失败: %s", e)
         return []
 
 
@@ -499,22 +660,29 @@ def load_all_employees() -> list:
 # ================================
 @app.on_event("startup")
 async def startup_event():
-    print("🚀 应用启动中...")
-    print("✅ 应用已启动，Uvicorn 正在运行...")
+    # 日志后台线程在应用启动时安装，导入 app.main 不启动线程
+    setup_logging()
+    logger.info("🚀 应用启动中...")
+    logger.info("✅ 应用已启动，Uvicorn 正在运行...")
 
-    # 启动定时任务
-    start_scheduler()
+    # 数据库迁移在后台线程执行，/health 不等待；访问数据库的接口在迁移完成前等待
+    start_migrations()
 
-    # 提交首次同步任务到事件循环，不阻塞
+    # 启动定时任务：apscheduler / pytz 在线程池中导入并启动，不推迟首个请求
     loop = asyncio.get_event_loop()
-    loop.run_in_executor(None, sync_yesterday_commits)
+    loop.run_in_executor(None, start_scheduler)
 
-    print("📌 首次数据同步任务已提交至后台执行...")
+    # 首次同步为可选项：默认由定时任务 / POST /sync 触发，避免每次重启都拉取全部项目
+    if config.SYNC_ON_STARTUP:
+        from app.services.sync_service import sync_yesterday_commits
+
+        loop.run_in_executor(None, partial(sync_yesterday_commits, trigger="startup"))
+        logger.info("📌 首次数据同步任务已提交至后台执行...")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    print("👋 应用正在关闭...")
+    logger.info("👋 应用正在关闭...")
 
 
 # ================================
@@ -535,7 +703,7 @@ def update_query_params(*args, **updates):
             if v is not None and v != ""
         )
     except Exception as e:
-        print(f"❌ update_query_params error: {e}")
+        logger.error("❌ update_query_params error: %s", e)
         return ""
 
 
@@ -543,4 +711,6 @@ def update_query_params(*args, **updates):
 templates.env.filters["update_query"] = update_query_params
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=False)
@@ -0,0 +1,140 @@
+# app/metrics.py
+# 进程内指标：计数器与直方图，按 Prometheus 文本格式导出（/metrics）
+# 多 worker 部署时每个进程各自计数，由 Prometheus 按实例抓取后聚合
+
+import abc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# 默认延迟桶（秒）：覆盖本地 SQLite 写入（毫秒级）到慢 GitLab 请求（数十秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{str(v)}"' for k, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def render(self) -> List[str]:
+        """返回该指标的样本行（不含 HELP / TYPE）"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [各桶计数..., +Inf 计数, 总和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        用法: with GITLAB_LATENCY.time(endpoint="commits.get"): ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in items:
+            labels = _format_labels(self.labelnames, key)
+            for bound, count in zip(self.buckets, series):
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-2]}")
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+
+def render_metrics() -> str:
+    """
+    按 Prometheus 文本格式（0.0.4）导出所有指标
+    """
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ================================
+# 指标定义
+# ================================
+GITLAB_CALLS = Counter("gitlab_api_calls_total", "GitLab API 调用次数", ["endpoint", "outcome"])
+GITLAB_RETRIES = Counter("gitlab_api_retries_total", "GitLab API 重试次数", ["endpoint"])
+GITLAB_LATENCY = Histogram("gitlab_api_latency_seconds", "GitLab API 调用耗时", ["endpoint"])
+
+DIFF_CACHE_LOOKUPS = Counter("diff_cache_lookups_total", "按 SHA 查询 diff 缓存的次数", ["result"])
+
+DB_WRITE_LATENCY = Histogram("db_write_latency_seconds", "数据库批量写入耗时", ["table"])
+DB_ROWS_WRITTEN = Counter("db_rows_written_total", "写入数据库的新行数", ["table"])
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP 请求数", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_latency_seconds", "HTTP 请求处理耗时", ["method", "route"])
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "日志队列写满时丢弃的日志条数")
+
+SYNC_RUNS = Counter("sync_runs_total", "同步任务执行次数", ["status"])
+SYNC_DURATION = Histogram("sync_duration_seconds", "同步任务总耗时", ["mode"],
+                          buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200))
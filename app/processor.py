@@ -1,54 +1,50 @@
 # app/processor.py
 
-import pandas as pd
+import logging
 from typing import Dict, Any, List
+from app.commit_filter import get_filter
 from app.config import config
+from app.utils.table_loader import iter_records, load_cached
+
+logger = logging.getLogger(__name__)
 
 # 全局变量：存储 email -> name 映射表
 email_mapping = {}
 
 
-def load_mapping() -> None:
+def parse_mapping(path: str) -> Dict[str, str]:
     """
-    启动时加载 mapping.xlsx 文件，构建 email 到 name 的映射字典
+    读取映射表（org 列 -> res 列），也支持同结构的 .csv / .json
     """
-    try:
-        # 读取 Excel 文件
-        df = pd.read_excel(config.MAPPING_FILE)
+    return {
+        str(row["org"]): str(row["res"])
+        for row in iter_records(path, ("org", "res"))
+        if row.get("org") is not None and row.get("res") is not None
+    }
 
-        # 构建映射字典
-        global email_mapping
-        email_mapping = df.set_index('org')['res'].to_dict()
-
-        print(f"✅ 成功加载 {len(email_mapping)} 条作者映射规则")
 
+def load_mapping() -> None:
+    """
+    同步开始时 / worker 每个任务前加载 mapping.xlsx 文件，构建 email 到 name 的映射字典（文件未变化时直接使用缓存）
+    读取失败（如文件正在被改写）时保留上一次成功加载的映射
+    """
+    global email_mapping
+    try:
+        mapping = load_cached(config.MAPPING_FILE, parse_mapping)
     except Exception as e:
-        print(f"❌ 加载 mapping.xlsx 失败: {e}")
-        email_mapping.clear()
+        logger.error("❌ 加载 mapping.xlsx 失败: %s", e)
+        return
+
+    if mapping is not email_mapping:
+        logger.info("✅ 成功加载 %s 条作者映射规则", len(mapping))
+    email_mapping = mapping
 
 
 def is_valid_commit(commit: Dict[str, Any]) -> bool:
     """
-    判断提交是否有效（过滤 CICD、大提交、合并提交等）
+    判断提交是否有效（过滤 CICD、大提交、合并提交等，规则见 app/commit_filter.py）
     """
-    author_name = str(commit.get('author_name', '')).lower()
-    author_email = str(commit.get('author_email', '')).lower()
-    message = str(commit.get('message', '')).lower()
-
-    # 规则1：排除 CICD 提交
-    for keyword in config.CICD_KEYWORDS:
-        if keyword in author_name or keyword in author_email or keyword in message:
-            return False
-
-    # 规则2：additions <= 2000
-    if commit.get('additions', 0) > config.MAX_ADDITIONS:
-        return False
-
-    # 规则3：非合并提交（parent_ids 长度 <= 1）
-    if len(commit.get('parent_ids', [])) > 1:
-        return False  # 是合并提交，排除
-
-    return True
+    return get_filter().reason(commit) is None
 
 
 def process_commits(raw_commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -61,31 +57,22 @@ def process_commits(raw_commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     Returns:
         处理后的提交列表（已过滤且 author_name 被映射）
     """
-    processed_commits = []
-    seen_commits_ids = set()  # 用于去重
-
+    # 1. 去重（同一提交可能出现在多个分支）
+    unique_commits = {}
     for commit in raw_commits:
-        # 去重
-        if commit['commit_id'] in seen_commits_ids:
-            continue
-        seen_commits_ids.add(commit['commit_id'])
+        unique_commits.setdefault(commit['commit_id'], commit)
 
-        # 1. 检查是否有效
-        if not is_valid_commit(commit):
-            continue
-
-        # 2. 获取author_name
-        ogr = str(commit.get('author_name', '')).strip()
+    # 2. 批量检查是否有效
+    processed_commits, rejected = get_filter().split(unique_commits.values())
 
+    for commit in processed_commits:
         # 3. 映射作者名
+        ogr = str(commit.get('author_name', '')).strip()
         if ogr and ogr in email_mapping:
             commit['author_name'] = email_mapping[ogr]
 
         # 4. 移除message（不存入数据库）
         commit.pop('message', None)
 
-        # 5. 添加到结果列表
-        processed_commits.append(commit)
-
-    print(f"✅ 原始提交 {len(raw_commits)} 条，有效提交 {len(processed_commits)} 条")
+    logger.info("✅ 原始提交 %s 条，有效提交 %s 条", len(raw_commits), len(processed_commits), extra=rejected)
     return processed_commits
@@ -0,0 +1,147 @@
+# app/profiling.py
+# 按请求的阶段耗时统计（Server-Timing 响应头）与抽样 profile 采集
+#
+# 接口内用 phase() 标记阶段：
+#     with phase("db"):
+#         result = (await db.execute(stmt)).all()
+# 未开启 PROFILING_ENABLED 时 phase() 只有一次 ContextVar 读取的开销
+
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.config import config
+from app.utils.concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# 当前请求的阶段耗时（毫秒），未开启或不在请求内时为 None
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+# 同一进程同一时刻只采集一个 profile（cProfile 不支持嵌套，且采样期间会包含并发请求）
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str):
+    """
+    记录一个阶段的耗时，同名阶段多次出现时累加
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+
+
+class _Profiler:
+    """
+    优先使用 pyinstrument（支持 async，输出 HTML），未安装时退化为 cProfile
+    """
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self._impl = Profiler(async_mode="enabled")
+            self.kind = "pyinstrument"
+        except ImportError:
+            import cProfile
+            self._impl = cProfile.Profile()
+            self.kind = "cprofile"
+
+    def start(self) -> None:
+        if self.kind == "pyinstrument":
+            self._impl.start()
+        else:
+            self._impl.enable()
+
+    def stop(self) -> None:
+        if self.kind == "pyinstrument":
+            self._impl.stop()
+        else:
+            self._impl.disable()
+
+    def save(self, path_without_ext: str) -> str:
+        os.makedirs(os.path.dirname(path_without_ext), exist_ok=True)
+        if self.kind == "pyinstrument":
+            path = f"{path_without_ext}.html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._impl.output_html())
+        else:
+            path = f"{path_without_ext}.prof"
+            self._impl.dump_stats(path)
+        return path
+
+
+class ProfilingMiddleware:
+    """
+    ASGI 中间件：为每个请求收集阶段耗时并写入 Server-Timing 响应头；
+    抽样或请求头触发时采集完整 profile 到 PROFILE_DIR；慢请求记录完整阶段耗时
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.trigger_header = config.PROFILE_TRIGGER_HEADER.lower().encode()
+
+    def _should_profile(self, scope) -> bool:
+        if any(k == self.trigger_header and v for k, v in scope.get("headers", [])):
+            return True
+        return config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        profiler = None
+        if self._should_profile(scope) and _profile_lock.acquire(blocking=False):
+            profiler = _Profiler()
+            profiler.start()
+
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings["total"] = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            total = (time.perf_counter() - start) * 1000
+            path = scope.get("path", "")
+
+            if profiler is not None:
+                profiler.stop()
+                try:
+                    name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{scope['method']}{path.replace('/', '_') or '_'}"
+                    saved = await run_blocking(profiler.save, os.path.join(config.PROFILE_DIR, name))
+                    logger.info("🧪 已采集 profile: %s", saved, extra={"path": path, "total_ms": round(total, 1)})
+                finally:
+                    _profile_lock.release()
+
+            if total >= config.SLOW_REQUEST_MS:
+                logger.warning(
+                    "🐢 慢请求 %s %s 耗时 %.1fms", scope["method"], path, total,
+                    extra={f"{k}_ms": round(v, 1) for k, v in timings.items() if k != "total"},
+                )
@@ -0,0 +1,32 @@
+# app/reprocess.py
+# 离线重算：修改 mapping.xlsx / CICD_KEYWORDS / MAX_ADDITIONS 后，用原始提交日志重新生成入库数据，不请求 GitLab
+#
+# 用法：
+#   python -m app.reprocess --dry-run                          # 只统计会改变的提交数
+#   python -m app.reprocess --since 2025-09-01 --until 2025-09-30
+#   python -m app.reprocess --days 30                          # 最近 30 天
+
+import argparse
+from datetime import date, timedelta
+
+from app.services.reprocess_service import reprocess
+from app.utils.logger import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用原始提交日志离线重算提交数据")
+    parser.add_argument("--since", type=date.fromisoformat, help="起始日期（含），默认最早的日志")
+    parser.add_argument("--until", type=date.fromisoformat, help="结束日期（含），默认最新的日志")
+    parser.add_argument("--days", type=int, help="只重算最近 N 天（与 --since 二选一）")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不改写数据")
+    args = parser.parse_args()
+
+    setup_logging()
+    since = args.since
+    if args.days:
+        since = date.today() - timedelta(days=args.days)
+    reprocess(since, args.until, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
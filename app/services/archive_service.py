@@ -0,0 +1,78 @@
+# app/services/archive_service.py
+
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from app.config import config
+from app.database.archive import month_of, month_range, write_partition
+from app.database.migrations import run_migrations
+from app.database.models import CommitRecord
+from app.database.session import SessionLocal
+from app.services.lease import Lease
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 归档任务的租约名：多个 uvicorn worker / 节点的定时任务以及离线重算同一时刻只有一个在改写 Parquet 分区
+ARCHIVE_LEASE = "archive_cold"
+
+
+def archive_cold_commits(horizon_days: int = None) -> int:
+    """
+    将早于 horizon_days 天的提交从 commit_records 移入按月分区的 Parquet 归档
+    逐月处理：写入分区成功后再删除热表中对应的行，避免一次性加载全部历史
+    其他进程正在归档 / 重算时直接跳过
+    返回: 归档的提交条数
+    """
+    horizon_days = config.ARCHIVE_HORIZON_DAYS if horizon_days is None else horizon_days
+    cutoff = datetime.combine(date.today() - timedelta(days=horizon_days), datetime.min.time())
+
+    run_migrations()
+
+    lease = Lease(ARCHIVE_LEASE)
+    if not lease.acquire():
+        logger.info("⏭️ 归档任务正在其他进程中执行，跳过本次归档")
+        return 0
+
+    db = SessionLocal()
+    archived = 0
+    try:
+        oldest = db.execute(select(func.min(CommitRecord.commit_date))).scalar()
+        if oldest is None or oldest >= cutoff:
+            logger.info("✅ 无早于 %s 的提交，无需归档", cutoff.date())
+            return 0
+
+        month_start, _ = month_range(month_of(oldest))
+        while month_start < cutoff:
+            lease.check()
+            _, month_end = month_range(month_of(month_start))
+            upper = min(month_end, cutoff)
+            in_month = (CommitRecord.commit_date >= month_start) & (CommitRecord.commit_date < upper)
+
+            rows = db.execute(select(CommitRecord.__table__).where(in_month)).mappings().all()
+            if rows:
+                total = write_partition(month_of(month_start), rows)
+                db.execute(delete(CommitRecord).where(in_month))
+                db.commit()
+                archived += len(rows)
+                logger.info("📦 已归档 %s：%s 条（分区共 %s 条）", month_of(month_start), len(rows), total)
+
+            month_start = month_end
+
+    except Exception as e:
+        db.rollback()
+        logger.error("❌ 归档失败: %s", e)
+        raise
+    finally:
+        db.close()
+        lease.release(completed=not lease.lost.is_set())
+
+    logger.info("🎉 归档完成，共移出 %s 条提交", archived)
+    return archived
+
+
+if __name__ == "__main__":
+    setup_logging()
+    archive_cold_commits()
@@ -0,0 +1,242 @@
+# app/services/job_queue.py
+# 基于数据库表 sync_jobs 的持久化任务队列：
+# - enqueue_projects 幂等写入（同一批次同一实例的同一项目只会有一个任务）
+# - claim_job 通过条件 UPDATE 原子领取，领取后在 visible_at 之前对其他 worker 不可见
+# - worker 宕机后任务超时重新可见；失败按指数退避重试，超过 max_attempts 标记为 failed
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from app.config import config, DEFAULT_INSTANCE
+from app.database.models import SyncJob
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def enqueue_projects(batch_id: str, projects: List[Dict], since: str, until: str,
+                     instance: str = DEFAULT_INSTANCE) -> int:
+    """
+    批量写入某个 GitLab 实例的项目级任务
+    projects: [{"project_id": 1, "project_name": "group/repo"}, ...]
+    返回: 新写入的任务数（已存在的同批次任务会被忽略）
+    """
+    if not projects:
+        return 0
+    now = datetime.now()
+    rows = [
+        {
+            "batch_id": batch_id,
+            "instance": instance,
+            "project_id": p["project_id"],
+            "project_name": p.get("project_name"),
+            "since": since,
+            "until": until,
+            "status": PENDING,
+            "attempts": 0,
+            "max_attempts": config.JOB_MAX_ATTEMPTS,
+            "visible_at": now,
+            "rows_written": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for p in projects
+    ]
+
+    db = SessionLocal()
+    inserted = 0
+    try:
+        # 每行 14 个参数，分块避免超过 SQLite 变量上限
+        for i in range(0, len(rows), 500):
+            stmt = insert(SyncJob).values(rows[i:i + 500]).on_conflict_do_nothing()
+            inserted += db.execute(stmt).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return inserted
+
+
+def _claimable(now: datetime):
+    return (
+        SyncJob.status.in_([PENDING, RUNNING])
+        & (SyncJob.visible_at <= now)
+        & (SyncJob.attempts < SyncJob.max_attempts)
+    )
+
+
+def claim_job(worker_id: str, visibility_timeout: int = None) -> Optional[SyncJob]:
+    """
+    领取一个可见的任务；没有可领取任务时返回 None
+    先查候选再条件更新，被其他 worker 抢先时换下一个候选
+    """
+    visibility_timeout = visibility_timeout or config.JOB_VISIBILITY_TIMEOUT_SECONDS
+    db = SessionLocal()
+    try:
+        for _ in range(5):
+            now = datetime.now()
+            candidate = db.execute(
+                select(SyncJob.id).where(_claimable(now)).order_by(SyncJob.visible_at, SyncJob.id).limit(1)
+            ).scalar()
+            if candidate is None:
+                return None
+
+            result = db.execute(
+                update(SyncJob)
+                .where(SyncJob.id == candidate)
+                .where(_claimable(now))
+                .values(
+                    status=RUNNING,
+                    worker_id=worker_id,
+                    attempts=SyncJob.attempts + 1,
+                    visible_at=now + timedelta(seconds=visibility_timeout),
+                    updated_at=now,
+                )
+            )
+            db.commit()
+            if result.rowcount == 1:
+                return db.get(SyncJob, candidate)
+        return None
+    finally:
+        db.close()
+
+
+def extend_visibility(job_id: int, worker_id: str, visibility_timeout: int = None) -> bool:
+    """
+    处理中延长任务的可见性超时；返回 False 表示任务已被其他 worker 重新领取
+    """
+    visibility_timeout = visibility_timeout or config.JOB_VISIBILITY_TIMEOUT_SECONDS
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job_id, SyncJob.worker_id == worker_id, SyncJob.status == RUNNING)
+            .values(visible_at=now + timedelta(seconds=visibility_timeout), updated_at=now)
+        )
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
+
+
+def complete_job(job_id: int, worker_id: str, rows_written: int) -> None:
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job_id, SyncJob.worker_id == worker_id)
+            .values(status=DONE, rows_written=rows_written, last_error=None, updated_at=now)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def fail_job(job: SyncJob, worker_id: str, error: str) -> str:
+    """
+    记录失败：未超过最大次数时按指数退避重新排队，否则标记为 failed
+    返回: 任务的新状态
+    """
+    now = datetime.now()
+    status = FAILED if job.attempts >= job.max_attempts else PENDING
+    backoff = config.JOB_RETRY_BACKOFF_SECONDS * 2 ** max(job.attempts - 1, 0)
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job.id, SyncJob.worker_id == worker_id)
+            .values(status=status, visible_at=now + timedelta(seconds=backoff),
+                    last_error=error[:2000], updated_at=now)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return status
+
+
+def fail_exhausted_jobs() -> int:
+    """
+    将已超时且尝试次数用尽的任务（worker 多次宕机）标记为 failed
+    """
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(SyncJob)
+            .where(SyncJob.status == RUNNING, SyncJob.visible_at <= now,
+                   SyncJob.attempts >= SyncJob.max_attempts)
+            .values(status=FAILED, last_error="可见性超时且已用尽重试次数", updated_at=now)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+def batch_summary(batch_id: str) -> Dict[str, int]:
+    """
+    统计批次内各状态的任务数与写入行数
+    返回: {"pending": 3, "running": 1, "done": 10, "failed": 0, "rows_written": 1234}
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(SyncJob.status, func.count(), func.sum(SyncJob.rows_written))
+            .where(SyncJob.batch_id == batch_id)
+            .group_by(SyncJob.status)
+        ).all()
+    finally:
+        db.close()
+    summary = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0, "rows_written": 0}
+    for status, count, written in rows:
+        summary[status] = count
+        summary["rows_written"] += int(written or 0)
+    return summary
+
+
+class VisibilityHeartbeat:
+    """
+    处理任务期间在后台线程中定期延长可见性超时
+    用法：
+        with VisibilityHeartbeat(job.id, worker_id):
+            ...
+    """
+
+    def __init__(self, job_id: int, worker_id: str, visibility_timeout: int = None):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.timeout = visibility_timeout or config.JOB_VISIBILITY_TIMEOUT_SECONDS
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job_id}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.timeout / 3):
+            try:
+                if not extend_visibility(self.job_id, self.worker_id, self.timeout):
+                    logger.warning("⚠️ 任务 %s 已被其他 worker 重新领取", self.job_id)
+                    return
+            except Exception as e:
+                logger.warning("⚠️ 任务 %s 延长可见性失败: %s", self.job_id, e)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -0,0 +1,150 @@
+# app/services/lease.py
+# 基于数据库的租约锁：多个 uvicorn worker / 多台机器共享同一数据库时，
+# 保证同名任务同一时刻只有一个持有者执行，持有者通过心跳续约，宕机后租约过期可被接管
+
+import os
+import socket
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from app.config import config
+from app.database.models import SyncLease
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(RuntimeError):
+    """
+    租约已过期并被其他进程接管：当前持有者应立即中止，不再写入也不记为完成
+    """
+
+
+def _new_holder_id() -> str:
+    # 同一进程内的不同调用（定时任务 / 手动触发）也需要互斥，因此附带随机后缀
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    """
+    用法：
+        lease = Lease("sync_yesterday")
+        if lease.acquire():
+            try:
+                ...
+                lease.check()  # 长任务在各步骤之间检查，租约被接管时抛出 LeaseLost
+            finally:
+                lease.release(completed=True)
+    """
+
+    def __init__(self, name: str, ttl_seconds: int = None):
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds or config.SYNC_LEASE_TTL_SECONDS)
+        self.holder = _new_holder_id()
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def acquire(self) -> bool:
+        """
+        尝试获取租约：租约未被持有或已过期时成功，并启动心跳线程
+        """
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            db.execute(insert(SyncLease).values(name=self.name).on_conflict_do_nothing())
+            result = db.execute(
+                update(SyncLease)
+                .where(SyncLease.name == self.name)
+                .where((SyncLease.holder.is_(None)) | (SyncLease.expires_at < now))
+                .values(holder=self.holder, acquired_at=now, heartbeat_at=now, expires_at=now + self.ttl)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        if result.rowcount != 1:
+            return False
+
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name=f"lease-{self.name}", daemon=True
+        )
+        self._heartbeat_thread.start()
+        return True
+
+    def _heartbeat(self) -> None:
+        interval = self.ttl.total_seconds() / 3
+        while not self._stop.wait(interval):
+            now = datetime.now()
+            db = SessionLocal()
+            try:
+                result = db.execute(
+                    update(SyncLease)
+                    .where(SyncLease.name == self.name)
+                    .where(SyncLease.holder == self.holder)
+                    .values(heartbeat_at=now, expires_at=now + self.ttl)
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning("⚠️ 租约 %s 续约失败: %s", self.name, e)
+                continue
+            finally:
+                db.close()
+
+            if result.rowcount != 1:
+                logger.error("❌ 租约 %s 已被其他进程接管，停止续约", self.name)
+                self.lost.set()
+                return
+
+    def check(self) -> None:
+        """
+        租约已被其他进程接管时抛出 LeaseLost
+        """
+        if self.lost.is_set():
+            raise LeaseLost(f"租约 {self.name} 已被其他进程接管")
+
+    def release(self, completed: bool = False) -> None:
+        """
+        释放租约；completed=True 时记录最近一次成功完成时间
+        """
+        self._stop.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join()
+
+        values = {"holder": None, "expires_at": None}
+        if completed:
+            values["last_completed_at"] = datetime.now()
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(SyncLease)
+                .where(SyncLease.name == self.name)
+                .where(SyncLease.holder == self.holder)
+                .values(**values)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+def get_lease(name: str) -> Optional[SyncLease]:
+    """
+    读取租约当前状态（用于判断是否有同步正在进行、最近一次完成时间）
+    """
+    db = SessionLocal()
+    try:
+        return db.execute(select(SyncLease).where(SyncLease.name == name)).scalar_one_or_none()
+    finally:
+        db.close()
+
+
+def is_held(lease: Optional[SyncLease]) -> bool:
+    return bool(lease and lease.holder and lease.expires_at and lease.expires_at >= datetime.now())
@@ -0,0 +1,166 @@
+# app/services/reprocess_service.py
+# 离线重算：用当前的 mapping.xlsx 与过滤规则重新处理原始提交日志，改写 commit_records（含 commit_file_stats）与 Parquet 归档中的对应提交，
+# 不请求 GitLab。列表阶段即被过滤的提交没有 stats，若按新规则变为有效，只计入 needs_refetch
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from app.commit_filter import get_filter
+from app.config import config
+from app.database import journal
+from app.database.archive import archived_commits, month_of, write_partition
+from app.database.migrations import run_migrations
+from app.database.models import CommitFileStat, CommitRecord
+from app.database.session import SessionLocal
+from app.processor import load_mapping, process_commits
+from app.services.archive_service import ARCHIVE_LEASE
+from app.services.lease import Lease
+from app.services.sync_service import SAVE_CHUNK_SIZE, _save_file_stats, instance_names, lease_name, to_row
+from app.utils.diff_stats import apply_file_stats
+
+logger = logging.getLogger(__name__)
+
+# 判断一条提交是否被改写时比较的字段
+COMPARED_FIELDS = ("author_name", "project_id", "branch", "additions", "deletions")
+
+SUMMARY_KEYS = ("journal", "accepted", "added", "removed", "changed", "unchanged", "needs_refetch")
+
+
+def _naive(value: datetime) -> datetime:
+    # 与 commit_records / Parquet 中存储的时间保持一致（不带时区）
+    return value.replace(tzinfo=None) if value and value.tzinfo else value
+
+
+def _chunks(items: List[Any]):
+    for i in range(0, len(items), SAVE_CHUNK_SIZE):
+        yield items[i:i + SAVE_CHUNK_SIZE]
+
+
+def _hot_commits(db, commit_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    found = {}
+    table = CommitRecord.__table__
+    for chunk in _chunks(commit_ids):
+        for row in db.execute(select(table).where(table.c.commit_id.in_(chunk))).mappings():
+            found[row["commit_id"]] = dict(row)
+    return found
+
+
+def reprocess_day(day: str, cutoff: datetime, dry_run: bool = False) -> Dict[str, int]:
+    """
+    重算某一天的原始提交日志，返回各类提交的条数
+    commit_date 早于 cutoff 的提交写入 Parquet 归档，其余写入 commit_records（与归档任务的划分一致）
+    """
+    commit_filter = get_filter()
+    # 与同步时一致：同一 SHA 出现在多个实例时保留优先级最高的实例（process_commits 按出现顺序去重）
+    rank = {name: n for n, name in enumerate(instance_names())}
+    raw = sorted(journal.read_day(day), key=lambda record: rank.get(record["instance"], len(rank)))
+    for record in raw:
+        record["commit_date"] = _naive(record["commit_date"])
+        # 带逐文件行数的提交按当前 DIFF_EXCLUDE_GLOBS 重新计算行数
+        apply_file_stats(record)
+    journal_ids = list({record["commit_id"] for record in raw})
+
+    with_stats = [record for record in raw if record["additions"] is not None]
+    needs_refetch = sum(
+        1 for record in raw if record["additions"] is None and commit_filter.reason(record) is None
+    )
+    accepted = process_commits(with_stats)
+    new_rows = {commit["commit_id"]: to_row(commit) for commit in accepted}
+
+    db = SessionLocal()
+    try:
+        months = {month_of(record["commit_date"]) for record in raw if record["commit_date"]}
+        existing = archived_commits(journal_ids, months)
+        existing.update(_hot_commits(db, journal_ids))
+
+        summary = dict.fromkeys(SUMMARY_KEYS, 0)
+        summary.update(journal=len(journal_ids), accepted=len(new_rows), needs_refetch=needs_refetch)
+        for commit_id, row in new_rows.items():
+            old = existing.get(commit_id)
+            if old is None:
+                summary["added"] += 1
+            elif any(old[f] != row[f] for f in COMPARED_FIELDS):
+                summary["changed"] += 1
+            else:
+                summary["unchanged"] += 1
+        summary["removed"] = sum(1 for commit_id in existing if commit_id not in new_rows)
+
+        if dry_run or not (summary["added"] or summary["removed"] or summary["changed"]):
+            return summary
+
+        # 热表：删除该天日志中的全部提交后重新插入（单个事务）；
+        # 逐文件行数不随归档移动，按有效提交整体重写，避免被移除的提交留下孤立的 commit_file_stats
+        hot_rows = [row for row in new_rows.values() if row["commit_date"] >= cutoff]
+        for chunk in _chunks(journal_ids):
+            db.execute(delete(CommitRecord).where(CommitRecord.commit_id.in_(chunk)))
+            db.execute(delete(CommitFileStat).where(CommitFileStat.commit_id.in_(chunk)))
+        for chunk in _chunks(hot_rows):
+            db.execute(insert(CommitRecord).values(chunk).on_conflict_do_nothing())
+        _save_file_stats(db, accepted)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # 归档：按月改写涉及的分区
+    cold_rows: Dict[str, List[Dict[str, Any]]] = {}
+    for row in new_rows.values():
+        if row["commit_date"] < cutoff:
+            cold_rows.setdefault(month_of(row["commit_date"]), []).append(row)
+    for month in sorted(months | set(cold_rows)):
+        write_partition(month, cold_rows.get(month, []), remove_ids=journal_ids)
+
+    return summary
+
+
+def reprocess(since: date = None, until: date = None, dry_run: bool = False) -> Dict[str, int]:
+    """
+    重算 [since, until] 内所有有日志的日期
+    持有全部实例的同步租约与归档租约，避免与同步任务 / 归档任务同时改写热表和 Parquet 分区
+    返回各日期汇总后的条数
+    """
+    run_migrations()
+    load_mapping()
+    cutoff = datetime.combine(date.today() - timedelta(days=config.ARCHIVE_HORIZON_DAYS), datetime.min.time())
+
+    days = journal.list_days(since, until)
+    if not days:
+        logger.warning("⚠️ %s 中没有可重算的原始提交日志", config.JOURNAL_DIR)
+        return dict.fromkeys(SUMMARY_KEYS, 0)
+
+    leases = []
+    if not dry_run:
+        for name in [ARCHIVE_LEASE] + [lease_name(name) for name in instance_names()]:
+            lease = Lease(name)
+            if not lease.acquire():
+                for held in leases:
+                    held.release()
+                raise RuntimeError(f"{name} 正在进行中（同步或归档），请稍后再重算")
+            leases.append(lease)
+
+    totals = dict.fromkeys(SUMMARY_KEYS, 0)
+    try:
+        for day in days:
+            for lease in leases:
+                lease.check()
+            summary = reprocess_day(day, cutoff, dry_run)
+            for key, value in summary.items():
+                totals[key] += value
+            logger.info(
+                "🔁 %s：日志 %d 条，有效 %d 条，新增 %d / 移除 %d / 改写 %d / 不变 %d，需重新拉取 %d",
+                day, summary["journal"], summary["accepted"], summary["added"], summary["removed"],
+                summary["changed"], summary["unchanged"], summary["needs_refetch"],
+                extra={"day": day, **summary},
+            )
+    finally:
+        for lease in leases:
+            lease.release()
+
+    logger.info("%s 重算完成：%s", "🧪 [dry-run]" if dry_run else "🎉", totals)
+    return totals
@@ -0,0 +1,168 @@
+# app/services/sync_progress.py
+# 同步进度：sync_runs 表中的执行记录 + 线程安全的计数器
+# 计数先在内存中累加，由后台线程定期以增量 UPDATE（x = x + delta）写回，
+# 多个 worker 进程同时更新同一条记录也不会互相覆盖
+
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+
+from app.database.models import SyncRun
+from app.database.session import SessionLocal
+from app.services.job_queue import batch_summary
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCESS = "success"
+FAILED = "failed"
+SKIPPED = "skipped"
+PARTIAL = "partial"  # 部分实例失败：成功的实例已写入，失败的实例不记为今天已完成
+
+COUNTERS = ("projects_total", "projects_scanned", "branches_skipped", "api_calls", "retries", "rows_written")
+
+# 内存计数写回数据库的间隔（秒）
+FLUSH_INTERVAL_SECONDS = 2
+
+
+def create_run(trigger: str, mode: str) -> str:
+    """
+    创建一条执行记录，返回 job id
+    """
+    run_id = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        db.add(SyncRun(id=run_id, trigger=trigger, mode=mode, status=QUEUED, started_at=datetime.now(),
+                       **{name: 0 for name in COUNTERS}))
+        db.commit()
+    finally:
+        db.close()
+    return run_id
+
+
+def update_run(run_id: str, **values) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(update(SyncRun).where(SyncRun.id == run_id).values(**values))
+        db.commit()
+    finally:
+        db.close()
+
+
+def finish_run(run_id: str, status: str, message: str = None) -> None:
+    update_run(run_id, status=status, message=message, finished_at=datetime.now())
+
+
+def get_run(run_id: str) -> Optional[Dict]:
+    db = SessionLocal()
+    try:
+        run = db.get(SyncRun, run_id)
+    finally:
+        db.close()
+    if run is None:
+        return None
+    result = {
+        "job_id": run.id,
+        "trigger": run.trigger,
+        "mode": run.mode,
+        "status": run.status,
+        "message": run.message,
+        "batch_id": run.batch_id,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        **{name: getattr(run, name) for name in COUNTERS},
+    }
+    if run.batch_id:
+        # queue 模式：入队完成后由 worker 继续执行，状态以批次内任务为准
+        jobs = batch_summary(run.batch_id)
+        result["jobs"] = jobs
+        if run.status in (SUCCESS, PARTIAL) and (jobs["pending"] or jobs["running"]):
+            result["status"] = RUNNING
+    return result
+
+
+def latest_active_run(exclude: str = None) -> Optional[str]:
+    """
+    返回最近一次仍在排队 / 执行中的 job id（用于提示“同步进行中”）
+    """
+    stmt = select(SyncRun.id).where(SyncRun.status.in_([QUEUED, RUNNING]))
+    if exclude:
+        stmt = stmt.where(SyncRun.id != exclude)
+    db = SessionLocal()
+    try:
+        return db.execute(stmt.order_by(SyncRun.started_at.desc()).limit(1)).scalar()
+    finally:
+        db.close()
+
+
+def run_for_batch(batch_id: str) -> Optional[str]:
+    """
+    queue 模式下 worker 通过任务批次号找到对应的执行记录
+    """
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(SyncRun.id).where(SyncRun.batch_id == batch_id)
+            .order_by(SyncRun.started_at.desc()).limit(1)
+        ).scalar()
+    finally:
+        db.close()
+
+
+class SyncStats:
+    """
+    同步过程中的计数器，run_id 为空时只在内存中计数
+    用法：
+        stats = SyncStats(run_id)
+        stats.incr("api_calls")
+        ...
+        stats.close()  # 停止后台写回并写入剩余增量
+    """
+
+    def __init__(self, run_id: str = None):
+        self.run_id = run_id
+        self.totals = {name: 0 for name in COUNTERS}
+        self._pending = {name: 0 for name in COUNTERS}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if run_id:
+            self._thread = threading.Thread(target=self._flush_loop, name=f"sync-stats-{run_id[:8]}", daemon=True)
+            self._thread.start()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.totals[name] += amount
+            self._pending[name] += amount
+
+    def flush(self) -> None:
+        if not self.run_id:
+            return
+        with self._lock:
+            deltas = {name: n for name, n in self._pending.items() if n}
+            self._pending = {name: 0 for name in COUNTERS}
+        if not deltas:
+            return
+        try:
+            update_run(self.run_id, **{name: getattr(SyncRun, name) + n for name, n in deltas.items()})
+        except Exception as e:
+            # 写回失败时把增量放回，下次再写
+            with self._lock:
+                for name, n in deltas.items():
+                    self._pending[name] += n
+            logger.warning("⚠️ 同步进度写回失败: %s", e)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(FLUSH_INTERVAL_SECONDS):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
@@ -1,78 +1,321 @@
 # app/services/sync_service.py
 
-from typing import List
-from app.utils.gitlab_client import get_commits_yesterday
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import case
+from sqlalchemy.dialects.sqlite import insert
+from app.config import config, DEFAULT_INSTANCE
+from app.utils.gitlab_client import get_commits_yesterday_all, create_client, list_projects, yesterday_range
 from app.processor import load_mapping, process_commits
 from app.database.session import SessionLocal
-from app.database.models import CommitRecord, Base, engine
+from app.database.models import CommitFileStat, CommitRecord
+from app.database.migrations import run_migrations
+from app.services.lease import Lease, LeaseLost, get_lease
+from app.services.job_queue import enqueue_projects
+from app.services.sync_progress import (
+    SyncStats, create_run, finish_run, latest_active_run, update_run, FAILED, PARTIAL, RUNNING, SKIPPED, SUCCESS,
+)
+from app.metrics import DB_ROWS_WRITTEN, DB_WRITE_LATENCY, SYNC_DURATION, SYNC_RUNS
 import datetime
+import logging
+import time
 
+logger = logging.getLogger(__name__)
 
-def sync_yesterday_commits():
+SAVE_CHUNK_SIZE = 500
+
+# 同步任务的租约名：定时任务、启动同步、手动同步共用，保证每个 GitLab 实例全局只有一个同步在执行
+SYNC_LEASE_NAME = "sync_yesterday"
+
+
+def lease_name(instance: str) -> str:
+    """
+    实例的同步租约名（default 实例沿用单实例时的租约名，保留已有的“今天已完成”记录）
+    """
+    return SYNC_LEASE_NAME if instance == DEFAULT_INSTANCE else f"{SYNC_LEASE_NAME}:{instance}"
+
+
+def instance_names(instances: List[str] = None) -> List[str]:
+    """
+    指定实例名列表（为空时为全部配置的实例），按配置中的优先级排序
+    """
+    names = [i.name for i in config.gitlab_instances()]
+    return [name for name in names if instances is None or name in instances]
+
+
+def _completed_today(instance: str) -> bool:
+    state = get_lease(lease_name(instance))
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+    return bool(state and state.last_completed_at and state.last_completed_at >= today)
+
+
+def acquire_leases(names: List[str]) -> Tuple[Dict[str, Lease], List[str]]:
+    """
+    逐个实例获取同步租约：正在被其他进程同步的实例跳过
+    返回: (实例名 -> 已获取的租约, 被占用的 "实例名@持有者")
+    """
+    leases = {}
+    busy = []
+    for name in names:
+        lease = Lease(lease_name(name))
+        if lease.acquire():
+            leases[name] = lease
+        else:
+            state = get_lease(lease_name(name))
+            busy.append(f"{name}@{state.holder if state else ''}")
+    return leases, busy
+
+
+def sync_yesterday_commits(force: bool = False, run_id: str = None, trigger: str = "schedule",
+                           instances: List[str] = None, leases: Dict[str, Lease] = None) -> dict:
     """
-    同步“昨天”的提交数据到数据库
-    主流程：GitLab → 处理 → 数据库
+    同步“昨天”的提交数据到数据库（多 worker / 多节点下通过数据库租约保证每个实例只有一个进程执行）
+
+    Args:
+        force: False 时（定时任务、启动同步）跳过今天已成功同步过的实例；手动触发传 True
+        run_id: 已创建的执行记录（/sync 先创建再放到后台执行），为空时新建
+        trigger: 触发方式 manual / schedule / startup，记录在 sync_runs 中
+        instances: 要同步的 GitLab 实例名，为空时同步全部实例（多个实例并行拉取）
+        leases: 调用方已获取的租约（/sync 在返回 job id 前获取），此时只同步这些实例，不再检查今天是否已完成
+
+    Returns:
+        {"status": "success" | "partial" | "running" | "skipped", "message": ..., "job_id": ...}
+        partial 表示部分实例认证失败 / 拉取异常 / 有项目未完整拉取：这些实例的租约不记为今天已完成，下次定时 / 启动同步会重试
     """
-    # 1. 初始化数据库（如果表不存在则创建）
-    Base.metadata.create_all(bind=engine)
-    print("✅ 确保数据库表已存在")
+    # 1. 初始化数据库（执行未应用的迁移）
+    run_migrations()
+    logger.info("✅ 确保数据库表结构为最新版本")
+
+    run_id = run_id or create_run(trigger, config.SYNC_MODE)
+    names = list(leases) if leases else instance_names(instances)
+
+    if not force and not leases:
+        done = [name for name in names if _completed_today(name)]
+        if done:
+            logger.info("✅ 今天已完成同步，跳过实例: %s", ", ".join(done))
+            names = [name for name in names if name not in done]
+        if not names:
+            finish_run(run_id, SKIPPED, "今天已完成同步")
+            SYNC_RUNS.inc(status=SKIPPED)
+            return {"status": "skipped", "message": "今天已完成同步", "job_id": run_id}
+
+    # 逐个实例获取租约：正在被其他进程同步的实例本次跳过，其余实例照常执行
+    busy = []
+    if not leases:
+        leases, busy = acquire_leases(names)
+    if busy:
+        logger.warning("⏳ 以下实例正在其他进程中同步，本次不重复执行: %s", ", ".join(busy))
+    if not leases:
+        message = f"数据同步正在进行中（{', '.join(busy)}）"
+        finish_run(run_id, SKIPPED, message)
+        SYNC_RUNS.inc(status=SKIPPED)
+        return {"status": "running", "message": message, "job_id": latest_active_run(exclude=run_id) or run_id}
+
+    names = list(leases)
+    update_run(run_id, status=RUNNING)
+    stats = SyncStats(run_id)
+    started = time.perf_counter()
+    status, message = FAILED, None
+    failed = names
+    try:
+        if config.SYNC_MODE == "queue":
+            # 分布式模式：force 时使用新批次号，避免与当天已完成的批次去重
+            batch_id = datetime.datetime.now().strftime("%Y-%m-%dT%H%M%S") if force else None
+            result = enqueue_yesterday_sync(batch_id, stats, run_id, names, leases)
+            failed = result["failed"]
+            message = f"已入队 {result['enqueued']} 个项目任务"
+        else:
+            failed = _sync_yesterday_commits(stats, names, leases)
+            message = "数据同步任务已执行"
+        if failed:
+            status = PARTIAL
+            message += f"，以下实例失败: {', '.join(failed)}"
+        else:
+            status = SUCCESS
+    except LeaseLost as e:
+        # 租约已被其他进程接管：中止本次同步，不记为完成，由接管者完成同步
+        message = str(e)
+        logger.error("❌ %s，本次同步中止", e)
+        raise
+    except Exception as e:
+        message = str(e)
+        raise
+    finally:
+        stats.close()
+        finish_run(run_id, status, message)
+        SYNC_RUNS.inc(status=status)
+        SYNC_DURATION.observe(time.perf_counter() - started, mode=config.SYNC_MODE)
+        # 失败的实例不记为今天已完成，下次定时 / 启动同步时重试
+        for name, lease in leases.items():
+            lease.release(completed=status != FAILED and name not in failed)
+    return {"status": status, "message": message, "job_id": run_id}
+
 
+def _sync_yesterday_commits(stats: SyncStats = None, instances: List[str] = None,
+                            leases: Dict[str, Lease] = None) -> List[str]:
+    """
+    主流程：GitLab（各实例并行）→ 跨实例去重 → 处理 → 数据库（调用方需持有各实例的同步租约）
+    leases: 实例名 -> 已持有的租约；任一租约被其他进程接管时不再开始新的项目，并在写库前抛出 LeaseLost
+    返回: 认证失败 / 拉取异常 / 未完整拉取的实例名（已拉到的提交照常入库）；全部实例都失败且没有拉到提交时抛出异常
+    """
+    names = instance_names(instances)
+    leases = leases or {}
     # 2. 加载作者映射表
     load_mapping()
 
     # 3. 从 GitLab 获取原始提交数据
-    raw_commits = get_commits_yesterday()
+    raw_commits, failed = get_commits_yesterday_all(
+        names, stats, cancel={name: lease.lost for name, lease in leases.items()}
+    )
+    # 租约已被接管：接管者会重新拉取，本进程不写入
+    for lease in leases.values():
+        lease.check()
+    if len(failed) == len(names) and not raw_commits:
+        raise RuntimeError(f"全部 GitLab 实例同步失败: {', '.join(failed)}")
     if not raw_commits:
-        print("⚠️ 未获取到任何提交数据，同步结束")
-        return
+        logger.warning("⚠️ 未获取到任何提交数据，同步结束")
+        return failed
 
     # 4. 处理提交数据（过滤 + 映射 author_name）
     processed_commits = process_commits(raw_commits)
     if not processed_commits:
-        print("⚠️ 处理后无有效提交，同步结束")
-        return
+        logger.warning("⚠️ 处理后无有效提交，同步结束")
+        return failed
+
+    # 5. 写入数据库（按主键去重，已存在的提交被忽略）
+    save_commits(processed_commits, stats)
+
+    logger.info("🎉 数据同步完成")
+    return failed
+
+
+def to_row(commit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    处理后的提交 -> commit_records 行
+    """
+    return {
+        "commit_id": commit['commit_id'],
+        "project_id": commit['project_id'],
+        "branch": commit['branch'],
+        "author_name": commit['author_name'],  # 已映射
+        "author_email": commit['author_email'],
+        "com_email": commit['com_email'],
+        "commit_date": commit['commit_date'],
+        "additions": commit['additions'],
+        "deletions": commit['deletions'],
+        "parent_ids": str(commit['parent_ids']),  # 转为字符串存储
+        "instance": commit.get('instance', DEFAULT_INSTANCE),
+    }
+
+
+def save_commits(processed_commits: List[Dict[str, Any]], stats: SyncStats = None) -> int:
+    """
+    将处理后的提交写入 commit_records：INSERT ... ON CONFLICT，
+    多个 worker 并发写入同一提交（如 fork 项目、镜像实例）时由主键（SHA）去重，无需预先加载全部已有 commit_id；
+    已存在的提交只有来自优先级更高的实例时才改写来源（见 _on_conflict）
+    返回: 新插入（或改写来源）的行数
+    """
+    if not processed_commits:
+        return 0
 
-    # 5. 写入数据库
     db = SessionLocal()
+    inserted = 0
     try:
-        # 统计去重：避免重复插入
-        existing_commit_ids = {
-            r[0] for r in db.query(CommitRecord.commit_id).all()
-        }
-        print(f"🔍 数据库中已有 {len(existing_commit_ids)} 条提交记录")
-
-        new_records = []
-        for commit in processed_commits:
-            if commit['commit_id'] not in existing_commit_ids:
-                # 构造数据库记录对象
-                record = CommitRecord(
-                    project_id=commit['project_id'],
-                    branch=commit['branch'],
-                    author_name=commit['author_name'],  # 已映射
-                    author_email=commit['author_email'],
-                    com_email=commit['com_email'],
-                    commit_date=commit['commit_date'],
-                    additions=commit['additions'],
-                    deletions=commit['deletions'],
-                    commit_id=commit['commit_id'],
-                    parent_ids=str(commit['parent_ids'])  # 转为字符串存储
-                )
-                print(record)
-                new_records.append(record)
-
-        # 批量插入
-        if new_records:
-            db.bulk_save_objects(new_records)
+        with DB_WRITE_LATENCY.time(table="commit_records"):
+            # 每行 11 个参数，分块避免超过 SQLite 变量上限；行字典按块生成，不与提交记录同时整批驻留内存
+            for i in range(0, len(processed_commits), SAVE_CHUNK_SIZE):
+                rows = [to_row(commit) for commit in processed_commits[i:i + SAVE_CHUNK_SIZE]]
+                inserted += db.execute(_on_conflict(insert(CommitRecord).values(rows))).rowcount
+            _save_file_stats(db, processed_commits)
             db.commit()
-            print(f"✅ 成功插入 {len(new_records)} 条新提交记录")
-        else:
-            print("✅ 无新提交记录，无需插入")
-
     except Exception as e:
         db.rollback()
-        print(f"❌ 数据库写入失败: {e}")
+        logger.error("❌ 数据库写入失败: %s", e)
         raise
     finally:
         db.close()
 
-    print("🎉 数据同步完成")
+    DB_ROWS_WRITTEN.inc(inserted, table="commit_records")
+    if stats:
+        stats.incr("rows_written", inserted)
+
+    if inserted:
+        logger.info("✅ 成功插入 %s 条新提交记录（%s 条已存在）", inserted, len(processed_commits) - inserted)
+    else:
+        logger.info("✅ 无新提交记录，无需插入")
+    return inserted
+
+
+def _on_conflict(stmt):
+    """
+    提交已存在时的处理：单实例时忽略；多实例时若新来源在配置中排在已有来源之前，改写 project_id / branch / instance，
+    保证不同同步时间的实例分别同步（如镜像实例早于主实例）时，仍然是配置中排在前面的实例胜出
+    """
+    names = instance_names()
+    if len(names) < 2:
+        return stmt.on_conflict_do_nothing()
+
+    def rank(column):
+        return case({name: n for n, name in enumerate(names)}, value=column, else_=len(names))
+
+    table = CommitRecord.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.commit_id],
+        set_={"project_id": stmt.excluded.project_id, "branch": stmt.excluded.branch,
+              "instance": stmt.excluded.instance},
+        where=rank(stmt.excluded.instance) < rank(table.c.instance),
+    )
+
+
+def _save_file_stats(db, processed_commits: List[Dict[str, Any]]) -> None:
+    """
+    写入逐文件行数（只有 DIFF_STATS_ENABLED 拉取过 diff 的提交带有 files）
+    """
+    file_rows = [
+        {"commit_id": commit['commit_id'], "path": f["path"], "additions": f["additions"], "deletions": f["deletions"]}
+        for commit in processed_commits
+        for f in commit.get('files') or ()
+    ]
+    for i in range(0, len(file_rows), SAVE_CHUNK_SIZE):
+        db.execute(insert(CommitFileStat).values(file_rows[i:i + SAVE_CHUNK_SIZE]).on_conflict_do_nothing())
+
+
+def enqueue_yesterday_sync(batch_id: str = None, stats: SyncStats = None, run_id: str = None,
+                           instances: List[str] = None, leases: Dict[str, Lease] = None) -> dict:
+    """
+    分布式同步的入队步骤：拉取各实例的项目列表，为每个项目写入一个 sync_jobs 任务，
+    实际拉取由 `python -m app.worker` 进程完成（调用方需持有各实例的同步租约）
+    某个实例认证失败时跳过该实例；全部失败时抛出异常
+    leases: 实例名 -> 已持有的租约，入队前检查，被其他进程接管时抛出 LeaseLost
+    """
+    names = instance_names(instances)
+    since, until = yesterday_range()
+    batch_id = batch_id or since[:10]
+    if run_id:
+        # worker 通过批次号找到执行记录并累加进度
+        update_run(run_id, batch_id=batch_id)
+
+    total_projects = inserted = 0
+    failed = []
+    for name in names:
+        gl = create_client(name)
+        if gl is None:
+            failed.append(name)
+            continue
+        projects = [
+            {"project_id": p.id, "project_name": getattr(p, 'path_with_namespace', str(p.id))}
+            for p in list_projects(gl, stats)
+        ]
+        if leases and name in leases:
+            leases[name].check()
+        enqueued = enqueue_projects(batch_id, projects, since, until, name)
+        total_projects += len(projects)
+        inserted += enqueued
+        logger.info("📌 批次 %s [%s]：共 %s 个项目，新入队 %s 个任务", batch_id, name, len(projects), enqueued)
+
+    if len(failed) == len(names):
+        raise RuntimeError("GitLab 认证失败，无法入队")
+    if failed:
+        logger.error("❌ 以下实例认证失败，未入队: %s", ", ".join(failed))
+    if stats:
+        stats.incr("projects_total", inserted)
+    return {"batch_id": batch_id, "projects": total_projects, "enqueued": inserted, "failed": failed}
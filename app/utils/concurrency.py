@@ -0,0 +1,24 @@
+# app/utils/concurrency.py
+# 异步接口中执行阻塞操作（Excel 解析、Parquet 读取等）的专用线程池，
+# 与 Starlette 默认线程池隔离，避免慢导出占满线程导致看板请求排队
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+# 阻塞任务线程数：只承载文件解析等短任务，数据库查询已走异步引擎
+BLOCKING_WORKERS = 4
+
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在专用线程池中执行阻塞函数，不阻塞事件循环
+    用法: employees = await run_blocking(load_all_employees)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, partial(func, *args, **kwargs))
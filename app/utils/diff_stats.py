@@ -0,0 +1,166 @@
+# app/utils/diff_stats.py
+# 按文件统计提交的新增 / 删除行数（DIFF_STATS_ENABLED 开启时使用）
+#
+# - 拉取提交 diff 后逐文件计数，匹配 DIFF_EXCLUDE_GLOBS 的文件（锁文件、vendored / 生成代码）不计入提交行数
+# - 解析结果按提交 SHA 缓存在 DIFF_CACHE_DIR，同一提交在不同分支、fork 项目或重复同步中只请求一次
+# - diff 请求单独限流（DIFF_FETCH_CONCURRENCY），不与项目 / 分支级并发共享额度
+
+import fnmatch
+import json
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import config
+from app.metrics import DIFF_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+_slots: Optional[threading.BoundedSemaphore] = None
+_slots_lock = threading.Lock()
+
+
+def _diff_slots() -> threading.BoundedSemaphore:
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(max(1, config.DIFF_FETCH_CONCURRENCY))
+        return _slots
+
+
+def count_lines(diff: str) -> Tuple[int, int]:
+    """
+    统计 unified diff 中的新增 / 删除行（GitLab 返回的 diff 从 @@ 开始，不含 ---/+++ 文件头）
+    """
+    additions = deletions = 0
+    for line in diff.splitlines():
+        if line.startswith("+"):
+            additions += 1
+        elif line.startswith("-"):
+            deletions += 1
+    return additions, deletions
+
+
+def parse_diff(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    GitLab commit diff 接口返回值 -> [{"path", "additions", "deletions"}]
+    被 GitLab 折叠（过大）而没有内容的文件，additions / deletions 为 None
+    """
+    files = []
+    for entry in entries:
+        path = entry.get("new_path") or entry.get("old_path") or ""
+        diff = entry.get("diff") or ""
+        if not diff and (entry.get("too_large") or entry.get("collapsed")):
+            files.append({"path": path, "additions": None, "deletions": None})
+            continue
+        additions, deletions = count_lines(diff)
+        files.append({"path": path, "additions": additions, "deletions": deletions})
+    return files
+
+
+@lru_cache(maxsize=8)
+def _compile_globs(globs: Tuple[str, ...]) -> Tuple[Optional["re.Pattern[str]"], Optional["re.Pattern[str]"]]:
+    """
+    不含 / 的模式匹配文件名，含 / 的模式匹配完整路径；各自合并为一个正则
+    """
+    name_globs = [g for g in globs if "/" not in g]
+    path_globs = [g for g in globs if "/" in g]
+    name_re = re.compile("|".join(fnmatch.translate(g) for g in name_globs)) if name_globs else None
+    path_re = re.compile("|".join(fnmatch.translate(g) for g in path_globs)) if path_globs else None
+    return name_re, path_re
+
+
+def is_excluded(path: str) -> bool:
+    name_re, path_re = _compile_globs(tuple(config.DIFF_EXCLUDE_GLOBS))
+    if name_re is not None and name_re.match(path.rsplit("/", 1)[-1]):
+        return True
+    # 以 / 开头再匹配一次，使 "**/vendor/**" 也能匹配仓库根目录下的 vendor/
+    return path_re is not None and bool(path_re.match(path) or path_re.match("/" + path))
+
+
+def _cache_path(sha: str) -> str:
+    return os.path.join(config.DIFF_CACHE_DIR, sha[:2], f"{sha}.json")
+
+
+def _read_cache(sha: str) -> Optional[List[Dict[str, Any]]]:
+    try:
+        with open(_cache_path(sha), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("⚠️ diff 缓存损坏，重新拉取 %s: %s", sha[:8], e)
+        return None
+
+
+def _write_cache(sha: str, files: List[Dict[str, Any]]) -> None:
+    path = _cache_path(sha)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(files, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def get_file_stats(sha: str, fetch) -> List[Dict[str, Any]]:
+    """
+    返回提交的逐文件行数：优先读取缓存，未命中时在 diff 限流内调用 fetch() 拉取并写入缓存
+    fetch: 无参函数，返回 GitLab commit diff 接口的结果
+    """
+    files = _read_cache(sha)
+    if files is not None:
+        DIFF_CACHE_LOOKUPS.inc(result="hit")
+        return files
+
+    DIFF_CACHE_LOOKUPS.inc(result="miss")
+    with _diff_slots():
+        entries = fetch()
+    files = parse_diff(entries)
+    try:
+        _write_cache(sha, files)
+    except OSError as e:
+        logger.warning("⚠️ 写入 diff 缓存失败 %s: %s", sha[:8], e)
+    return files
+
+
+def apply_file_stats(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按当前排除规则，用 record["files"] 重新计算提交的 additions / deletions（原地修改并返回）
+    total_additions / total_deletions 保存 GitLab 给出的整提交行数。被 GitLab 折叠（行数未知）的文件：
+    - 只有被排除的文件折叠：未排除文件的行数全部已知，直接求和
+    - 只有未排除的文件折叠：整提交行数减去被排除文件的行数
+    - 两类都有折叠：无法确定，additions / deletions 置为 None（不退化为整提交行数，否则锁文件行数会被计入）
+    """
+    files = record.get("files")
+    if not files:
+        return record
+    record.setdefault("total_additions", record["additions"])
+    record.setdefault("total_deletions", record["deletions"])
+
+    included_add = included_del = excluded_add = excluded_del = 0
+    unknown_included = unknown_excluded = False
+    for f in files:
+        if is_excluded(f["path"]):
+            if f["additions"] is None:
+                unknown_excluded = True
+            else:
+                excluded_add += f["additions"]
+                excluded_del += f["deletions"]
+        elif f["additions"] is None:
+            unknown_included = True
+        else:
+            included_add += f["additions"]
+            included_del += f["deletions"]
+
+    if not unknown_included:
+        record["additions"] = included_add
+        record["deletions"] = included_del
+    elif not unknown_excluded and record["total_additions"] is not None:
+        record["additions"] = max(record["total_additions"] - excluded_add, included_add)
+        record["deletions"] = max(record["total_deletions"] - excluded_del, included_del)
+    else:
+        record["additions"] = record["deletions"] = None
+    return record
@@ -1,68 +1,208 @@
 # app/utils/gitlab_client.py
+# 支持多个 GitLab 实例（config.GITLAB_INSTANCES）：每个实例一个持久客户端（首次使用时认证，之后复用），
+# 各自的 HTTP 连接池、项目并发数与请求限速互不影响
 
-import gitlab
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from app.config import config
+from typing import List, Dict, Any, Tuple
+from app.commit_data import CommitData
+from app.commit_filter import get_filter
+from app.config import config, DEFAULT_INSTANCE, GitLabInstance
+from app.database import journal
+from app.utils import diff_stats
+from app.metrics import GITLAB_CALLS, GITLAB_LATENCY, GITLAB_RETRIES
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import threading
 import time
 
+logger = logging.getLogger(__name__)
 
-def get_commits_yesterday() -> List[Dict[str, Any]]:
+# 实例名 -> 已认证的 gitlab.Gitlab（进程内复用，worker 线程共享同一连接池）
+_clients: Dict[str, Any] = {}
+# 每个实例一把锁：认证较慢 / 不可达的实例不阻塞其他实例创建客户端
+_client_locks: Dict[str, threading.Lock] = {}
+_clients_lock = threading.Lock()
+
+
+class IncompleteFetch(RuntimeError):
     """
-    获取所有项目中 '昨天' 的提交记录（包含 additions/deletions）
-    - 并发拉取项目列表（带重试）
-    - 每个项目：获取所有分支，遍历每个分支拉取提交
-    - 过滤合并提交、CI/CD 提交、过大的提交（additions > MAX_ADDITIONS）
-    - 每成功一条提交，立即打印
+    部分项目 / 分支 / 提交重试后仍拉取失败；commits 为已成功拉取的有效提交（调用方可先行入库）
     """
 
-    # 初始化 GitLab 实例
-    gl = gitlab.Gitlab(config.GITLAB_URL, private_token=config.GITLAB_TOKEN, timeout=30)
+    def __init__(self, message: str, commits: List[CommitData]):
+        super().__init__(message)
+        self.commits = commits
+
+
+def _call(stats, endpoint: str, func, *args, **kwargs):
+    """
+    执行一次 GitLab API 调用，记录调用次数、耗时与结果（stats 为本次同步的 SyncStats，可为空）
+    """
+    if stats:
+        stats.incr("api_calls")
+    start = time.perf_counter()
     try:
-        gl.auth()
-        print(f"✅ 认证成功，用户: {gl.user.username}")
-    except Exception as e:
-        print(f"❌ 认证失败: {e}")
-        return []
+        result = func(*args, **kwargs)
+    except Exception:
+        GITLAB_CALLS.inc(endpoint=endpoint, outcome="error")
+        raise
+    finally:
+        GITLAB_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+    GITLAB_CALLS.inc(endpoint=endpoint, outcome="ok")
+    return result
+
+
+def _record_retry(stats, endpoint: str) -> None:
+    if stats:
+        stats.incr("retries")
+    GITLAB_RETRIES.inc(endpoint=endpoint)
+
+
+def _call_with_retry(stats, endpoint: str, func, *args, attempts: int = 3, delay: float = 2, **kwargs):
+    """
+    带重试的 _call：失败后等待 delay 秒重试，共 attempts 次，最后一次的异常抛给调用方
+    """
+    for attempt in range(attempts):
+        try:
+            return _call(stats, endpoint, func, *args, **kwargs)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            _record_retry(stats, endpoint)
+            time.sleep(delay)
+
+
+class RateLimiter:
+    """
+    令牌桶限速：平均每秒 rate 次，允许 burst 次突发；多线程共享
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 令牌不足时预支一个，按欠额计算等待时间（在锁外睡眠，其他线程继续排队）
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def get_instance(name: str = None) -> GitLabInstance:
+    """
+    按名称查找配置的实例；name 为空时返回第一个（优先级最高的）实例
+    """
+    instances = config.gitlab_instances()
+    if name is None:
+        return instances[0]
+    for instance in instances:
+        if instance.name == name:
+            return instance
+    raise KeyError(f"未配置的 GitLab 实例: {name}")
+
+
+def _create_session(instance: GitLabInstance):
+    """
+    实例专用的 requests.Session：连接池大小为 pool_size，每个请求发出前经过该实例的限速器
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    limiter = RateLimiter(instance.requests_per_second) if instance.requests_per_second > 0 else None
+
+    class _InstanceAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            if limiter is not None:
+                limiter.acquire()
+            return super().send(request, **kwargs)
 
-    # ✅ 计算时间范围（UTC 00:00:00 ~ 23:59:59）
+    adapter = _InstanceAdapter(pool_connections=1, pool_maxsize=instance.pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_client(instance: str = None):
+    """
+    返回实例的持久客户端：首次调用时创建并认证，之后复用（连接保持、不重复认证）
+    instance 为空时使用第一个配置的实例；认证失败返回 None（不缓存，下次调用重试）
+    """
+    # python-gitlab 体积较大，只在真正同步时加载，不拖慢 Web 进程启动
+    import gitlab
+
+    target = get_instance(instance)
+    with _clients_lock:
+        lock = _client_locks.setdefault(target.name, threading.Lock())
+    with lock:
+        gl = _clients.get(target.name)
+        if gl is not None:
+            return gl
+
+        gl = gitlab.Gitlab(target.url, private_token=target.token, timeout=30, session=_create_session(target))
+        try:
+            _call(None, "auth", gl.auth)
+            logger.info("✅ [%s] 认证成功，用户: %s", target.name, gl.user.username)
+        except Exception as e:
+            logger.error("❌ [%s] 认证失败: %s", target.name, e)
+            return None
+        _clients[target.name] = gl
+        return gl
+
+
+def yesterday_range() -> Tuple[str, str]:
+    """
+    计算 '昨天' 的查询时间范围（UTC 00:00:00 ~ 23:59:59），返回 GitLab API 使用的 ISO 字符串
+    """
     today = datetime.now()
     yesterday = today - timedelta(days=1)
     start_time = datetime.combine(yesterday, datetime.min.time())
     end_time = datetime.combine(yesterday, datetime.max.time())
-    since = start_time.isoformat() + 'Z'
-    until = end_time.isoformat() + 'Z'
+    return start_time.isoformat() + 'Z', end_time.isoformat() + 'Z'
 
-    print(f"📅 查询时间范围: {since} 到 {until} (UTC)")
 
-    all_commits = []
+def list_projects(gl, stats=None) -> List:
+    """
+    并发拉取全部未归档项目（带重试），每 5 页一批，连续 5 页为空时结束
+    """
     projects = []
 
     # ✅ 并发拉取项目列表（带重试）
-    print("📌 开始并发拉取项目列表（带重试）...")
+    logger.info("📌 开始并发拉取项目列表（带重试）...")
+    import gitlab
 
     def fetch_project_page(page: int, max_retries=3) -> List:
         for attempt in range(max_retries):
             try:
-                batch = gl.projects.list(page=page, per_page=100, archived=False, simple=True)
+                batch = _call(stats, "projects.list", gl.projects.list,
+                              page=page, per_page=100, archived=False, simple=True)
                 if batch:
-                    print(f"✅ 成功拉取第 {page} 页，{len(batch)} 个项目")
+                    logger.debug("✅ 成功拉取第 %d 页，%d 个项目", page, len(batch))
                 return batch
             except gitlab.exceptions.GitlabHttpError as e:
                 if e.response_code == 500 and attempt < max_retries - 1:
-                    print(f"⚠️ 第 {page} 页 500 错误，第 {attempt + 1} 次重试...")
+                    logger.warning("⚠️ 第 %d 页 500 错误，第 %d 次重试...", page, attempt + 1)
+                    _record_retry(stats, "projects.list")
                     time.sleep(3)
                     continue
                 else:
-                    print(f"❌ 获取第 {page} 页失败 (HTTP {e.response_code}): {e}")
+                    logger.error("❌ 获取第 %d 页失败 (HTTP %s): %s", page, e.response_code, e)
             except Exception as e:
                 if attempt < max_retries - 1:
-                    print(f"⚠️ 网络异常，第 {page} 页重试 {attempt + 1}/{max_retries}: {e}")
+                    logger.warning("⚠️ 网络异常，第 %d 页重试 %d/%d: %s", page, attempt + 1, max_retries, e)
+                    _record_retry(stats, "projects.list")
                     time.sleep(3)
                     continue
                 else:
-                    print(f"❌ 获取第 {page} 页失败（最终失败）: {e}")
+                    logger.error("❌ 获取第 %d 页失败（最终失败）: %s", page, e)
         return []
 
     page = 1
@@ -79,161 +219,368 @@ def get_commits_yesterday() -> List[Dict[str, Any]]:
 
             # 如果连续 5 页都为空，说明拉取完成
             if not has_data:
-                print(f"🔚 连续 5 页无数据，停止拉取项目列表")
+                logger.info("🔚 连续 5 页无数据，停止拉取项目列表")
                 break
 
             # ✅ 实时打印累计项目数
-            print(f"📌 已累计拉取 {len(projects)} 个项目...")
+            logger.info("📌 已累计拉取 %d 个项目...", len(projects))
 
             page += 5
 
-    if not projects:
-        print("❌ 未获取到任何项目")
-        return []
+    return projects
 
-    print(f"✅ 共获取到 {len(projects)} 个项目，开始并发拉取各分支的昨日提交...")
 
-    # ✅ 并发处理每个项目（获取其所有分支的提交）
-    def fetch_commits_from_project(project) -> List[Dict]:
-        commit_list = []
-        project_name = getattr(project, 'path_with_namespace', project.id)
+def fetch_commits_from_project(gl, project_id: int, project_name: str, since: str, until: str,
+                               stats=None, instance: str = DEFAULT_INSTANCE, strict: bool = False) -> List[CommitData]:
+    """
+    拉取单个项目所有分支在 [since, until] 内的提交（含 additions/deletions）
+    - 过滤合并提交、CI/CD 提交、过大的提交（additions > MAX_ADDITIONS）
+    - 项目本身重试后仍无法加载时抛出异常
+    - stats 不为空时累计 API 调用、重试、跳过分支等进度计数
+    - instance 为 gl 对应的实例名，记录在每条提交的 instance 字段中
+    - strict 为 True 时分支列表 / 提交列表 / 提交详情 / diff 重试后仍失败则在项目结束时抛出 IncompleteFetch
+      （带已拉取的有效提交）：队列任务据此按退避重试整个项目，本地同步据此把实例记为部分失败；
+      为 False 时记录后跳过，只返回其余数据
+    """
+    try:
+        return _fetch_commits_from_project(gl, project_id, project_name, since, until, stats, instance, strict)
+    finally:
+        if stats:
+            stats.incr("projects_scanned")
 
-        try:
-            # 获取完整项目对象（用于访问分支和提交）
-            full_project = gl.projects.get(project.id)
-        except Exception as e:
-            print(f"❌ 无法加载项目 {project.id} ({project_name}): {e}")
-            return []
 
-        # 获取所有分支
-        branches = []
-        try:
-            branches = full_project.branches.list(all=True)
-        except Exception as e:
-            print(f"⚠️ 无法获取项目 {project.id} ({project_name}) 的分支列表: {e}")
+def _fetch_commits_from_project(gl, project_id, project_name, since, until, stats, instance,
+                                strict=False) -> List[CommitData]:
+    commit_list = []
+    project_name = project_name or project_id
 
-        if not branches:
-            return []
+    try:
+        # 获取完整项目对象（用于访问分支和提交）
+        full_project = _call_with_retry(stats, "projects.get", gl.projects.get, project_id)
+    except Exception as e:
+        logger.error("❌ 无法加载项目 %s (%s): %s", project_id, project_name, e)
+        raise
 
-        print(f"🔍 项目 [{project_name}] 共 {len(branches)} 个分支，开始检查...")
+    # 获取所有分支
+    branches = []
+    try:
+        branches = _call_with_retry(stats, "branches.list", full_project.branches.list, all=True)
+    except Exception as e:
+        logger.warning("⚠️ 无法获取项目 %s (%s) 的分支列表: %s", project_id, project_name, e)
+        if strict:
+            raise IncompleteFetch(f"项目 {project_id} ({project_name}) 分支列表拉取失败: {e}", []) from e
 
-        # 遍历每个分支
-        for branch_obj in branches:
-            branch = branch_obj.name
-            branch_commits = []
+    if not branches:
+        return []
 
-            # 获取该分支在时间范围内的提交（带重试）
-            for retry in range(3):
+    logger.debug("🔍 项目 [%s] 共 %d 个分支，开始检查...", project_name, len(branches))
+    # 按项目汇总计数，替代逐条提交打印
+    counts = {"accepted": 0, "merge": 0, "ci": 0, "too_large": 0, "errors": 0}
+    # 重试后仍失败的列表 / 详情请求（strict 时据此让整个项目重试）
+    fetch_failures = 0
+    commit_filter = get_filter()
+    # 原始提交（commit_id -> 记录），项目结束后写入原始提交日志，供离线重算
+    raw_records = {}
+
+    # 遍历每个分支
+    for branch_obj in branches:
+        branch = branch_obj.name
+        branch_commits = []
+
+        # 获取该分支在时间范围内的提交（带重试）
+        for retry in range(3):
+            try:
+                branch_commits = _call(
+                    stats, "commits.list", full_project.commits.list,
+                    ref_name=branch,
+                    since=since,
+                    until=until,
+                    all=False,
+                    per_page=100
+                )
+                break
+            except Exception as e:
+                if retry < 2:
+                    logger.warning("⚠️ 项目 %s 分支 %s 提交拉取失败，重试 %d/3", project_id, branch, retry + 1)
+                    _record_retry(stats, "commits.list")
+                    time.sleep(3)
+                else:
+                    logger.error("❌ 项目 %s 分支 %s 提交拉取失败: %s", project_id, branch, e)
+                    fetch_failures += 1
+                branch_commits = []
+
+        if not branch_commits:
+            if stats:
+                stats.incr("branches_skipped")
+            continue
+
+        # 列表接口已包含作者、提交者邮箱、说明与父提交：先批量过滤合并 / CI 提交，省去这些提交的详情请求
+        candidates, rejected = commit_filter.split(c.attributes for c in branch_commits)
+        for reason, n in rejected.items():
+            counts[reason] += n
+        candidate_ids = {c["id"] for c in candidates}
+        for c in branch_commits:
+            if c.attributes["id"] not in candidate_ids:
+                raw_records.setdefault(c.attributes["id"], _list_record(c.attributes, project_id, branch, instance))
+
+        # 处理该分支的每一条提交
+        for commit in candidates:
+            commit_id = commit["id"]
+            # 从其他分支拉出的分支包含相同提交：详情已在前面的分支获取过，入库时也按 commit_id 保留先出现的分支
+            if commit_id in raw_records:
+                continue
+            try:
+                # 获取提交详情
                 try:
-                    branch_commits = full_project.commits.list(
-                        ref_name=branch,
-                        since=since,
-                        until=until,
-                        all=False,
-                        per_page=100
-                    )
-                    break
+                    detail = _call_with_retry(stats, "commits.get", full_project.commits.get, commit_id)
                 except Exception as e:
-                    if retry < 2:
-                        print(f"⚠️ 项目 {project.id} 分支 {branch} 提交拉取失败，重试 {retry + 1}/3")
-                        time.sleep(3)
-                    else:
-                        print(f"❌ 项目 {project.id} 分支 {branch} 提交拉取失败: {e}")
-                    branch_commits = []
-
-            if not branch_commits:
-                continue
+                    logger.warning("⚠️ 获取提交详情失败 (%s): %s", commit_id, e)
+                    detail = None
+                if not detail:
+                    counts["errors"] += 1
+                    fetch_failures += 1
+                    continue
 
-            # 处理该分支的每一条提交
-            for commit in branch_commits:
+                # 提取信息
+                author_name = detail.author_name or "Unknown"
+                message = (detail.message or "").strip()
+                additions = detail.stats.get('additions', 0) if detail.stats else 0
+                deletions = detail.stats.get('deletions', 0) if detail.stats else 0
+
+                # ✅ 解析提交时间
                 try:
-                    # 跳过合并提交
-                    if hasattr(commit, 'parent_ids') and len(commit.parent_ids) > 1:
-                        continue
+                    commit_time_str = detail.committed_date
+                    commit_time = datetime.fromisoformat(commit_time_str.replace('Z', '+00:00'))
+                except Exception as e:
+                    logger.warning("⚠️ 时间解析失败 %s: %s", commit_time_str, e)
+                    counts["errors"] += 1
+                    continue
 
-                    # 获取提交详情
-                    detail = None
-                    for r in range(3):
-                        try:
-                            detail = full_project.commits.get(commit.id)
-                            break
-                        except Exception as e:
-                            if r < 2:
-                                time.sleep(2)
-                            else:
-                                print(f"⚠️ 获取提交详情失败 ({commit.id}): {e}")
-                    if not detail:
+                # ✅ 构造提交记录（只保留所需字段，详情 RESTObject 随本次循环释放）
+                record = CommitData(
+                    instance=instance,
+                    project_id=project_id,
+                    branch=branch,
+                    author_name=author_name,
+                    author_email=detail.author_email,
+                    com_email=detail.committer_email,
+                    commit_date=commit_time,
+                    additions=additions,
+                    deletions=deletions,
+                    commit_id=detail.id,
+                    parent_ids=detail.parent_ids or [],  # ← 不要 str()
+                    message=message,
+                )
+
+                # ✅ 逐文件统计：排除锁文件 / 生成代码后重新计算行数（diff 按 SHA 缓存）
+                if config.DIFF_STATS_ENABLED:
+                    if not _attach_file_stats(record, detail, stats):
+                        # diff 重试后仍失败：排除规则无法应用，不按整提交行数决定去留，计为拉取失败
+                        fetch_failures += 1
+                    if record['additions'] is None:
+                        # 行数无法确定：不入库也不记为过滤，原始提交日志中没有行数，重算时计入 needs_refetch
+                        raw_records.setdefault(record['commit_id'], record)
+                        counts["errors"] += 1
                         continue
 
-                    # 提取信息
-                    author_name = detail.author_name or "Unknown"
-                    author_email = (detail.author_email or "").lower()
-                    committer_email = (detail.committer_email or "").lower()
-                    message = (detail.message or "").strip()
-                    additions = detail.stats.get('additions', 0) if detail.stats else 0
-                    deletions = detail.stats.get('deletions', 0) if detail.stats else 0
-
-                    # ✅ CI/CD 过滤（使用 config.CICD_KEYWORDS）
-                    is_ci = (
-                        'noreply' in committer_email or
-                        'bot@' in committer_email or
-                        any(kw.lower() in author_name.lower() for kw in config.CICD_KEYWORDS) or
-                        any(kw.lower() in message.lower() for kw in config.CICD_KEYWORDS)
-                    )
-                    if is_ci:
-                        continue
+                raw_records.setdefault(record['commit_id'], record)
 
-                    # ✅ 过大提交过滤
-                    if additions > config.MAX_ADDITIONS:
-                        print(f"🟡 跳过过大提交: {detail.id[:8]} | +{additions} (>{config.MAX_ADDITIONS})")
-                        continue
+                # ✅ 详情中带有 additions，按同一套规则再判断一次（过大提交在此过滤）
+                reason = commit_filter.reason(record)
+                if reason:
+                    logger.debug("🟡 跳过提交: %s | %s | +%d", record['commit_id'][:8], reason, additions)
+                    counts[reason] += 1
+                    continue
 
-                    # ✅ 解析提交时间
-                    try:
-                        commit_time_str = detail.committed_date
-                        commit_time = datetime.fromisoformat(commit_time_str.replace('Z', '+00:00'))
-                    except Exception as e:
-                        print(f"⚠️ 时间解析失败 {commit_time_str}: {e}")
-                        continue
+                # ✅ 逐条明细仅在 DEBUG 级别输出（按模板采样）
+                logger.debug(
+                    "🟢 提交成功 | %s | %s | %s | %s | +%d/-%d",
+                    author_name, project_name, branch, record['commit_id'][:8], additions, deletions
+                )
 
-                    # ✅ 构造数据库记录对象
-                    record = {
-                        'project_id': project.id,
-                        'branch': branch,
-                        'author_name': author_name,
-                        'author_email': detail.author_email,
-                        'com_email': detail.committer_email,
-                        'commit_date': commit_time,
-                        'additions': additions,
-                        'deletions': deletions,
-                        'commit_id': detail.id,
-                        'parent_ids': detail.parent_ids or [],  # ← 不要 str()
-                        'message': message
-                    }
-
-                    # ✅ 实时打印
-                    print(
-                        f"🟢 提交成功 | {author_name} | {project_name} | {branch} | {record['commit_id'][:8]} | "
-                        f"+{record['additions']}/-{record['deletions']}"
-                    )
-
-                    commit_list.append(record)
+                counts["accepted"] += 1
+                commit_list.append(record)
 
-                except Exception as e:
-                    print(f"❌ 处理提交 {commit.id} 时异常: {e}")
-                    continue
+            except Exception as e:
+                logger.warning("❌ 处理提交 %s 时异常: %s", commit_id, e)
+                counts["errors"] += 1
+                continue
+
+    if config.JOURNAL_ENABLED and raw_records:
+        try:
+            journal.write_project(since[:10], project_id, raw_records.values(), instance)
+        except Exception as e:
+            logger.warning("⚠️ 写入项目 %s 原始提交日志失败: %s", project_id, e)
+
+    # 提交说明只用于过滤与原始提交日志：有效提交要在内存中保留到当天全部拉取完才入库，写完日志即释放
+    for record in commit_list:
+        record.pop('message', None)
+
+    logger.info(
+        "🔍 [%s] 项目 [%s] 完成：%d 个分支，有效 %d 条，跳过 合并 %d / CI %d / 过大 %d / 异常 %d",
+        instance, project_name, len(branches), counts["accepted"], counts["merge"], counts["ci"],
+        counts["too_large"], counts["errors"],
+        extra={"instance": instance, "project_id": project_id, **counts},
+    )
+    if strict and fetch_failures:
+        raise IncompleteFetch(
+            f"项目 {project_id} ({project_name}) 有 {fetch_failures} 个分支 / 提交拉取失败", commit_list
+        )
+    return commit_list
+
+
+def _attach_file_stats(record: CommitData, detail, stats) -> bool:
+    """
+    拉取（或从缓存读取）提交的逐文件行数，按排除规则改写 record 的 additions / deletions
+    （行数无法确定时为 None，见 diff_stats.apply_file_stats）
+    diff 重试后仍失败时 additions / deletions 置为 None 并返回 False
+    """
+    try:
+        record['files'] = diff_stats.get_file_stats(
+            detail.id, lambda: _call_with_retry(stats, "commits.diff", detail.diff, all=True)
+        )
+    except Exception as e:
+        logger.warning("⚠️ 获取提交 %s 的 diff 失败，本次不入库: %s", detail.id[:8], e)
+        record['additions'] = record['deletions'] = None
+        return False
+    diff_stats.apply_file_stats(record)
+    if record['additions'] is None:
+        logger.warning("⚠️ 提交 %s 的被排除文件与其余文件均被 GitLab 折叠，无法确定行数，本次不入库", detail.id[:8])
+    return True
 
-        return commit_list
+
+def _list_record(attributes: Dict[str, Any], project_id: int, branch: str, instance: str) -> CommitData:
+    """
+    列表接口阶段即被过滤的提交：没有 stats，只记录用于重新判断规则的字段
+    """
+    committed_date = attributes.get("committed_date")
+    return CommitData(
+        instance=instance,
+        project_id=project_id,
+        branch=branch,
+        author_name=attributes.get("author_name") or "Unknown",
+        author_email=attributes.get("author_email"),
+        com_email=attributes.get("committer_email"),
+        commit_date=datetime.fromisoformat(committed_date.replace('Z', '+00:00')) if committed_date else None,
+        additions=None,
+        deletions=None,
+        commit_id=attributes["id"],
+        parent_ids=attributes.get("parent_ids") or [],
+        message=(attributes.get("message") or "").strip(),
+    )
+
+
+def get_commits_yesterday(stats=None, instance: str = None, cancel: threading.Event = None) -> List[CommitData]:
+    """
+    获取单个实例所有项目中 '昨天' 的提交记录（包含 additions/deletions）
+    - 并发拉取项目列表（带重试）
+    - 每个项目：获取所有分支，遍历每个分支拉取提交（项目并发数为实例的 max_workers）
+    - 过滤合并提交、CI/CD 提交、过大的提交（additions > MAX_ADDITIONS）
+    - stats（SyncStats，可为空）用于上报同步进度
+    - 认证失败时抛出异常，由调用方把该实例记为失败（不能当作“没有提交”）
+    - 有项目重试后仍未完整拉取时抛出 IncompleteFetch（带其余项目的提交），该实例不能记为今天已完成
+    - cancel 被设置（如同步租约被其他进程接管）后不再开始新的项目，取消未开始的项目并抛出异常
+    """
+    target = get_instance(instance)
+    gl = create_client(target.name)
+    if gl is None:
+        raise RuntimeError(f"[{target.name}] GitLab 认证失败")
+
+    since, until = yesterday_range()
+    logger.info("📅 [%s] 查询时间范围: %s 到 %s (UTC)", target.name, since, until)
+
+    all_commits = []
+    projects = list_projects(gl, stats)
+
+    if not projects:
+        logger.error("❌ [%s] 未获取到任何项目", target.name)
+        return []
+    if stats:
+        stats.incr("projects_total", len(projects))
+
+    logger.info("✅ [%s] 共获取到 %d 个项目，开始并发拉取各分支的昨日提交...", target.name, len(projects))
+
+    def fetch(project) -> List[CommitData]:
+        if cancel is not None and cancel.is_set():
+            return []
+        return fetch_commits_from_project(
+            gl, project.id, getattr(project, 'path_with_namespace', project.id), since, until, stats, target.name,
+            strict=True,
+        )
 
     # ✅ 并发处理所有项目
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(fetch_commits_from_project, project) for project in projects]
+    failed_projects = 0
+    with ThreadPoolExecutor(max_workers=max(1, target.max_workers)) as executor:
+        futures = [executor.submit(fetch, project) for project in projects]
         for future in as_completed(futures):
+            if cancel is not None and cancel.is_set():
+                for pending in futures:
+                    pending.cancel()
+                raise RuntimeError(f"[{target.name}] 同步已取消")
             try:
-                commit_list = future.result()
-                all_commits.extend(commit_list)
+                all_commits.extend(future.result())
+            except IncompleteFetch as e:
+                # 保留项目中已成功拉取的提交，项目记为失败
+                all_commits.extend(e.commits)
+                failed_projects += 1
+                logger.error("❌ [%s] %s", target.name, e)
             except Exception as e:
-                print(f"❌ 项目处理任务异常: {e}")
+                failed_projects += 1
+                logger.error("❌ [%s] 项目处理任务异常: %s", target.name, e)
+
+    logger.info("✅ [%s] 全部完成，共获取到 %d 条有效提交记录", target.name, len(all_commits))
+    if failed_projects:
+        raise IncompleteFetch(f"[{target.name}] {failed_projects} 个项目未完整拉取", all_commits)
+    return all_commits
+
 
-    print(f"✅ 全部完成，共获取到 {len(all_commits)} 条有效提交记录")
-    return all_commits
\ No newline at end of file
+def get_commits_yesterday_all(instances: List[str] = None, stats=None,
+                              cancel: Dict[str, threading.Event] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    并行拉取多个实例（默认全部配置的实例）的昨日提交，并按 SHA 跨实例去重：
+    镜像实例中的同一提交只保留一条，来源取配置中排在前面的实例
+    cancel: 实例名 -> 取消事件（见 get_commits_yesterday）
+    返回: (去重后的提交, 认证失败 / 拉取异常 / 未完整拉取的实例名)；未完整拉取的实例已拉到的提交照常返回
+    """
+    names = instances or [i.name for i in config.gitlab_instances()]
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    failed = []
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="gitlab") as executor:
+        futures = {
+            executor.submit(get_commits_yesterday, stats, name, (cancel or {}).get(name)): name for name in names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except IncompleteFetch as e:
+                logger.error("❌ %s", e)
+                results[name] = e.commits
+                failed.append(name)
+            except Exception as e:
+                logger.error("❌ [%s] 实例同步异常: %s", name, e)
+                results[name] = []
+                failed.append(name)
+
+    return dedupe_across_instances(results[name] for name in names), [name for name in names if name in failed]
+
+
+def dedupe_across_instances(commit_lists) -> List[Dict[str, Any]]:
+    """
+    按实例优先级合并多个实例的提交：同一 commit_id（SHA）只保留第一次出现的记录
+    同一实例内不同分支的重复提交原样保留，由 process_commits 去重
+    """
+    merged: List[Dict[str, Any]] = []
+    owner: Dict[str, str] = {}
+    duplicates = 0
+    for commits in commit_lists:
+        for commit in commits:
+            instance = commit.get('instance', DEFAULT_INSTANCE)
+            first = owner.setdefault(commit['commit_id'], instance)
+            if first != instance:
+                duplicates += 1
+                continue
+            merged.append(commit)
+    if duplicates:
+        logger.info("🔁 跨实例重复提交 %d 条，已按实例优先级去重", duplicates)
+    return merged
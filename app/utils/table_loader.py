@@ -0,0 +1,102 @@
+# app/utils/table_loader.py
+# 轻量表格读取：mapping.xlsx / employee.xlsx 等小表直接逐行读成 dict，不再经过 pandas DataFrame
+#
+# 支持的格式（按扩展名判断）：
+#   .xlsx / .xlsm  openpyxl 只读模式逐行读取第一个工作表
+#   .csv           首行为表头，UTF-8（兼容 Excel 导出的 BOM）
+#   .json          对象数组：[{"列名": 值, ...}, ...]
+# 解析结果按 (路径, 解析函数) 缓存，文件修改时间或大小变化后自动重新读取
+
+import csv
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (路径, 解析函数名) -> (mtime_ns, size, 结果)
+_cache: Dict[Tuple[str, str], Tuple[int, int, Any]] = {}
+_cache_lock = threading.Lock()
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _xlsx_rows(path: str) -> Iterator[Sequence[Any]]:
+    from openpyxl import load_workbook  # 延迟导入，只有读取 Excel 时才需要
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _csv_rows(path: str) -> Iterator[Sequence[Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.reader(f)
+
+
+def _json_rows(path: str) -> Iterator[Sequence[Any]]:
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError(f"{os.path.basename(path)} 必须是对象数组")
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    yield columns
+    for record in records:
+        yield [record.get(column) for column in columns]
+
+
+_READERS = {
+    ".xlsx": _xlsx_rows,
+    ".xlsm": _xlsx_rows,
+    ".csv": _csv_rows,
+    ".json": _json_rows,
+}
+
+
+def iter_records(path: str, required: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取表格，返回 {列名: 值} 字典（列名与字符串值去除首尾空格，空字符串视为 None）
+    表头缺少 required 中任一列时抛出 ValueError；整行为空的行会被跳过
+    """
+    reader = _READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"不支持的文件格式: {os.path.basename(path)}（支持 {', '.join(_READERS)}）")
+
+    rows = reader(path)
+    header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+    missing = [column for column in required if column not in header]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} 必须包含 {', '.join(repr(c) for c in missing)} 列")
+
+    for row in rows:
+        values = [_clean(v) for v in row]
+        if all(v is None for v in values):
+            continue
+        yield {column: value for column, value in zip(header, values) if column}
+
+
+def load_cached(path: str, parse: Callable[[str], T]) -> T:
+    """
+    返回 parse(path) 的结果；文件未变化时直接返回缓存（调用方不要修改返回值）
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), parse.__qualname__)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        result = parse(path)
+        _cache[key] = (stat.st_mtime_ns, stat.st_size, result)
+        logger.debug("📄 已重新读取 %s", path)
+        return result
@@ -0,0 +1,125 @@
+# app/worker.py
+# 分布式同步 worker：从 sync_jobs 领取项目级任务，拉取提交、过滤映射后写入 commit_records
+# 任务可来自不同的 GitLab 实例，按任务的 instance 使用对应实例的持久客户端（进程内各线程共享）
+#
+# 用法：
+#   python -m app.worker                 # 持续轮询领取任务（可在多台共享数据库的机器上启动任意多个）
+#   python -m app.worker --threads 8     # 单进程内 8 个线程并发处理任务
+#   python -m app.worker --drain         # 队列为空时退出
+#   python -m app.worker --enqueue       # 只执行入队步骤（持有同步租约）
+
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+
+from app.database.migrations import run_migrations
+from app.processor import load_mapping, process_commits
+from app.services.job_queue import (
+    VisibilityHeartbeat, claim_job, complete_job, fail_exhausted_jobs, fail_job, DONE,
+)
+from app.services.sync_progress import SyncStats, run_for_batch
+from app.services.sync_service import save_commits
+from app.config import config
+from app.utils.gitlab_client import create_client, fetch_commits_from_project
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def process_job(job, worker_id: str) -> int:
+    """
+    执行单个项目任务，返回写入的新行数；进度累加到该批次对应的 sync_runs 记录
+    """
+    gl = create_client(job.instance)
+    if gl is None:
+        raise RuntimeError(f"GitLab 实例 {job.instance} 认证失败")
+    # 每个任务重新检查映射表：文件未修改时直接使用缓存，长期运行的 worker 也能用上修改后的 mapping.xlsx
+    load_mapping()
+
+    stats = SyncStats(run_for_batch(job.batch_id))
+    try:
+        with VisibilityHeartbeat(job.id, worker_id):
+            raw_commits = fetch_commits_from_project(
+                gl, job.project_id, job.project_name, job.since, job.until, stats, job.instance, strict=True
+            )
+            processed_commits = process_commits(raw_commits)
+            return save_commits(processed_commits, stats)
+    finally:
+        stats.close()
+
+
+def run_worker(worker_id: str, drain: bool, poll_interval: float, stop: threading.Event) -> None:
+    while not stop.is_set():
+        fail_exhausted_jobs()
+        job = claim_job(worker_id)
+        if job is None:
+            if drain:
+                return
+            stop.wait(poll_interval)
+            continue
+
+        logger.info("🔧 [%s] 领取任务 %s：[%s] 项目 %s（第 %s 次）",
+                    worker_id, job.id, job.instance, job.project_name, job.attempts)
+        try:
+            written = process_job(job, worker_id)
+        except Exception as e:
+            status = fail_job(job, worker_id, f"{e}\n{traceback.format_exc()}")
+            logger.error("❌ [%s] 任务 %s 失败（%s）: %s", worker_id, job.id, status, e)
+            continue
+
+        complete_job(job.id, worker_id, written)
+        logger.info("✅ [%s] 任务 %s %s，写入 %s 条", worker_id, job.id, DONE, written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitLab 提交同步 worker")
+    parser.add_argument("--threads", type=int, default=4, help="单进程内并发处理的任务数")
+    parser.add_argument("--poll-interval", type=float, default=5, help="队列为空时的轮询间隔（秒）")
+    parser.add_argument("--drain", action="store_true", help="队列为空时退出")
+    parser.add_argument("--enqueue", action="store_true", help="只执行入队步骤后退出")
+    args = parser.parse_args()
+
+    setup_logging()
+    run_migrations()
+
+    if args.enqueue:
+        from app.services.sync_service import sync_yesterday_commits
+        config.SYNC_MODE = "queue"
+        # 非强制：同一天重复入队时批次号相同，已存在的任务被忽略
+        logger.info("%s", sync_yesterday_commits())
+        return
+
+    # 预先认证全部实例；个别实例认证失败时，其任务在领取后失败并按退避重试
+    authenticated = [i.name for i in config.gitlab_instances() if create_client(i.name) is not None]
+    if not authenticated:
+        raise SystemExit(1)
+
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=run_worker, args=(f"{base_id}:{n}", args.drain, args.poll_interval, stop),
+            name=f"worker-{n}",
+        )
+        for n in range(args.threads)
+    ]
+    for t in threads:
+        t.start()
+    logger.info("🚀 worker %s 已启动 %s 个线程", base_id, args.threads)
+
+    try:
+        while any(t.is_alive() for t in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("👋 正在停止 worker（等待当前任务完成）...")
+        stop.set()
+    for t in threads:
+        t.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# benchmarks/gitlab_stub.py
+# 本地 GitLab REST 桩服务：按参数生成确定性的合成数据（项目 / 分支 / 每日提交 / diff），
+# 可注入延迟与 429 / 500 错误，供同步基准（benchmarks.sync）离线使用，不访问真实 GitLab
+#
+# 只实现同步用到的接口：
+#   GET /api/v4/user
+#   GET /api/v4/projects?page=&per_page=
+#   GET /api/v4/projects/:id
+#   GET /api/v4/projects/:id/repository/branches
+#   GET /api/v4/projects/:id/repository/commits?ref_name=&since=&until=
+#   GET /api/v4/projects/:id/repository/commits/:sha
+#   GET /api/v4/projects/:id/repository/commits/:sha/diff
+# 另有 GET /_stub/stats（按接口统计的请求数与注入的错误数）与 POST /_stub/reset
+#
+# 用法：
+#   python -m benchmarks.gitlab_stub --port 8929 --projects 200 --branches 4 --commits-per-day 30 \
+#       --latency-ms 20 --error-rate 0.01 --throttle-rate 0.02
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ROUTES = [
+    ("user", re.compile(r"^/api/v4/user$")),
+    ("projects.list", re.compile(r"^/api/v4/projects$")),
+    ("projects.get", re.compile(r"^/api/v4/projects/(?P<project>\d+)$")),
+    ("branches.list", re.compile(r"^/api/v4/projects/(?P<project>\d+)/repository/branches$")),
+    ("commits.list", re.compile(r"^/api/v4/projects/(?P<project>\d+)/repository/commits$")),
+    ("commits.get", re.compile(r"^/api/v4/projects/(?P<project>\d+)/repository/commits/(?P<sha>[0-9a-f]{40})$")),
+    ("commits.diff", re.compile(r"^/api/v4/projects/(?P<project>\d+)/repository/commits/(?P<sha>[0-9a-f]{40})/diff$")),
+]
+
+DIFF_FILES = ["src/app.py", "src/util.py", "README.md", "package-lock.json", "vendor/lib/x.go", "web/app.min.js"]
+
+
+@dataclass
+class StubOptions:
+    projects: int = 50
+    # 每个项目的分支数（第一个为 main）
+    branches: int = 3
+    # 每个分支每天的提交数
+    commits_per_day: int = 20
+    # 非 main 分支中与 main 相同的提交比例（模拟从 main 拉出的分支，同步时需要去重）
+    shared_ratio: float = 0.5
+    # 合并提交 / CI 提交 / 过大提交的比例
+    merge_rate: float = 0.05
+    ci_rate: float = 0.05
+    large_rate: float = 0.02
+    authors: int = 300
+    # 每个请求的固定延迟与随机抖动（毫秒）
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # 返回 500 / 429 的概率（/user 不注入错误）
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    # 429 响应的 Retry-After（秒），0 表示不返回该头（python-gitlab 退化为指数退避）
+    retry_after: int = 0
+    seed: int = 42
+
+
+def _sha(*parts: Any) -> str:
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class SyntheticGitLab:
+    """
+    确定性的合成数据：同样的参数与日期总是生成同样的提交
+    """
+
+    def __init__(self, options: StubOptions):
+        self.options = options
+
+    def project(self, project_id: int) -> Optional[Dict[str, Any]]:
+        if not 1 <= project_id <= self.options.projects:
+            return None
+        return {
+            "id": project_id,
+            "name": f"repo-{project_id}",
+            "path_with_namespace": f"group-{project_id % 10}/repo-{project_id}",
+            "default_branch": "main",
+            "archived": False,
+        }
+
+    def projects_page(self, page: int, per_page: int) -> List[Dict[str, Any]]:
+        start = (page - 1) * per_page + 1
+        end = min(start + per_page - 1, self.options.projects)
+        return [self.project(pid) for pid in range(start, end + 1)]
+
+    def branch_names(self, project_id: int) -> List[str]:
+        return ["main"] + [f"feature/{project_id}-{n}" for n in range(1, self.options.branches)]
+
+    def branches(self, project_id: int) -> List[Dict[str, Any]]:
+        return [{"name": name, "merged": False, "protected": name == "main", "default": name == "main"}
+                for name in self.branch_names(project_id)]
+
+    def _commit(self, project_id: int, branch: str, day: str, n: int) -> Dict[str, Any]:
+        sha = _sha(project_id, branch, day, n)
+        rng = random.Random(f"{self.options.seed}:{sha}")
+        author = rng.randrange(self.options.authors)
+        kind = rng.random()
+        name, email = f"dev{author}", f"dev{author}@example.com"
+        message = f"feat: change {n} on {branch}"
+        parents = [_sha(sha, "parent")]
+        additions = rng.randrange(1, 300)
+        if kind < self.options.merge_rate:
+            parents.append(_sha(sha, "parent2"))
+            message = f"Merge branch '{branch}' into 'main'"
+        elif kind < self.options.merge_rate + self.options.ci_rate:
+            name, email = "gitlab-runner", "runner@example.com"
+            message = "chore(ci): bump version"
+        elif kind < self.options.merge_rate + self.options.ci_rate + self.options.large_rate:
+            additions = rng.randrange(5000, 20000)
+        committed = datetime.fromisoformat(day) + timedelta(seconds=rng.randrange(86400))
+        return {
+            "id": sha,
+            "short_id": sha[:8],
+            "title": message,
+            "message": message,
+            "author_name": name,
+            "author_email": email,
+            "committer_name": name,
+            "committer_email": email,
+            "authored_date": committed.isoformat() + "Z",
+            "committed_date": committed.isoformat() + "Z",
+            "parent_ids": parents,
+            "stats": {"additions": additions, "deletions": rng.randrange(0, 200), "total": 0},
+        }
+
+    def commits(self, project_id: int, branch: str, since: str) -> List[Dict[str, Any]]:
+        """
+        分支在 since 当天的提交：main 的提交独立生成，其他分支前 shared_ratio 部分与 main 相同
+        """
+        day = (since or datetime.now().isoformat())[:10]
+        count = self.options.commits_per_day
+        if branch == "main":
+            return [self._commit(project_id, "main", day, n) for n in range(count)]
+        shared = int(count * self.options.shared_ratio)
+        return ([self._commit(project_id, "main", day, n) for n in range(shared)]
+                + [self._commit(project_id, branch, day, n) for n in range(shared, count)])
+
+    def commit(self, project_id: int, sha: str, since_day: str) -> Optional[Dict[str, Any]]:
+        # 详情按 sha 反查：在最近两天的提交中查找（同步只拉取“昨天”）
+        for day in (since_day, (datetime.fromisoformat(since_day) - timedelta(days=1)).date().isoformat()):
+            for branch in self.branch_names(project_id):
+                for commit in self.commits(project_id, branch, day):
+                    if commit["id"] == sha:
+                        return commit
+        return None
+
+    def diff(self, commit: Dict[str, Any]) -> List[Dict[str, Any]]:
+        rng = random.Random(commit["id"])
+        entries = []
+        for path in rng.sample(DIFF_FILES, rng.randrange(1, 4)):
+            lines = "".join(f"+line {i}\n" for i in range(rng.randrange(1, 40)))
+            entries.append({"old_path": path, "new_path": path, "diff": "@@ -0,0 +1 @@\n" + lines,
+                            "new_file": False, "renamed_file": False, "deleted_file": False})
+        return entries
+
+
+class _Index:
+    """
+    sha -> 提交 的缓存：commits.get 不必每次重新生成整个项目的提交
+    """
+
+    def __init__(self, data: SyntheticGitLab):
+        self.data = data
+        self._commits: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def remember(self, project_id: int, commits: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for commit in commits:
+                self._commits[(project_id, commit["id"])] = commit
+
+    def lookup(self, project_id: int, sha: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            found = self._commits.get((project_id, sha))
+        return found or self.data.commit(project_id, sha, datetime.now().date().isoformat())
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, options: StubOptions):
+        super().__init__(address, _Handler)
+        self.options = options
+        self.data = SyntheticGitLab(options)
+        self.index = _Index(self.data)
+        self.rng = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests: Dict[str, int] = {}
+            self.injected = {"429": 0, "500": 0}
+
+    def count(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def fault(self) -> Optional[int]:
+        """
+        按配置的概率返回要注入的状态码
+        """
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.options.throttle_rate:
+            return 429
+        if roll < self.options.throttle_rate + self.options.error_rate:
+            return 500
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"requests": dict(self.requests), "total": sum(self.requests.values()),
+                    "injected": dict(self.injected)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 不输出每个请求的访问日志
+        pass
+
+    def _send(self, status: int, body: Any, headers: Dict[str, str] = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if urlsplit(self.path).path == "/_stub/reset":
+            self.server.reset()
+            return self._send(200, {"status": "ok"})
+        self._send(404, {"message": "404 Not Found"})
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/_stub/stats":
+            return self._send(200, self.server.stats())
+
+        for endpoint, pattern in ROUTES:
+            match = pattern.match(parts.path)
+            if match:
+                break
+        else:
+            return self._send(404, {"message": "404 Not Found"})
+
+        self.server.count(endpoint)
+        options = self.server.options
+        if options.latency_ms or options.jitter_ms:
+            time.sleep((options.latency_ms + random.uniform(0, options.jitter_ms)) / 1000)
+
+        status = self.server.fault() if endpoint != "user" else None
+        if status is not None:
+            with self.server.lock:
+                self.server.injected[str(status)] += 1
+            headers = {"Retry-After": str(options.retry_after)} if status == 429 and options.retry_after else {}
+            return self._send(status, {"message": f"{status} injected"}, headers)
+
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self._send(*self._dispatch(endpoint, match.groupdict(), query))
+
+    def _dispatch(self, endpoint: str, params: Dict[str, str], query: Dict[str, str]) -> Tuple[int, Any]:
+        data = self.server.data
+        if endpoint == "user":
+            return 200, {"id": 1, "username": "stub-bench", "name": "Stub Bench"}
+        if endpoint == "projects.list":
+            return 200, data.projects_page(int(query.get("page", 1)), int(query.get("per_page", 20)))
+
+        project_id = int(params["project"])
+        project = data.project(project_id)
+        if project is None:
+            return 404, {"message": "404 Project Not Found"}
+        if endpoint == "projects.get":
+            return 200, project
+        if endpoint == "branches.list":
+            return 200, data.branches(project_id)
+        if endpoint == "commits.list":
+            commits = data.commits(project_id, query.get("ref_name", "main"), query.get("since"))
+            self.server.index.remember(project_id, commits)
+            return 200, commits
+
+        commit = self.server.index.lookup(project_id, params["sha"])
+        if commit is None:
+            return 404, {"message": "404 Commit Not Found"}
+        if endpoint == "commits.get":
+            return 200, commit
+        return 200, data.diff(commit)
+
+
+def serve(options: StubOptions, host: str = "127.0.0.1", port: int = 0) -> StubServer:
+    """
+    在后台线程启动桩服务，返回 server（server.server_address 为实际监听地址，server.shutdown() 停止）
+    """
+    server = StubServer((host, port), options)
+    threading.Thread(target=server.serve_forever, name="gitlab-stub", daemon=True).start()
+    return server
+
+
+def add_options(parser: argparse.ArgumentParser) -> None:
+    """
+    把 StubOptions 的字段注册为命令行参数（--commits-per-day 等），benchmarks.sync 复用
+    """
+    for field in fields(StubOptions):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=field.type, default=field.default)
+
+
+def options_from_args(args: argparse.Namespace) -> StubOptions:
+    return StubOptions(**{field.name: getattr(args, field.name) for field in fields(StubOptions)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 GitLab REST 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8929)
+    add_options(parser)
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), options_from_args(args))
+    print(f"🧪 GitLab 桩服务已启动: http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
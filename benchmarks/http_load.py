@@ -0,0 +1,108 @@
+# benchmarks/http_load.py
+# HTTP 并发压测：对运行中的服务以固定并发持续请求，统计吞吐与延迟分位数
+#
+# 用法：
+#   uvicorn app.main:app --port 8000
+#   python -m benchmarks.http_load --url "http://127.0.0.1:8000/?days=30" --concurrency 50 --duration 20
+#   # 同时压测多个接口（如慢导出 + 看板，观察导出是否拖慢看板）
+#   python -m benchmarks.http_load --url "/export?days=180" --url "/?days=7" --base http://127.0.0.1:8000
+
+import argparse
+import http.client
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urljoin, urlsplit
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_load(urls: List[str], concurrency: int, duration: float, timeout: float = 30) -> Dict[str, dict]:
+    """
+    concurrency 个线程轮流请求 urls，持续 duration 秒
+    返回: {url: {"requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"}}
+    """
+    latencies: Dict[str, List[float]] = {url: [] for url in urls}
+    errors: Dict[str, int] = {url: 0 for url in urls}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int):
+        conns = {}
+        i = offset
+        while time.perf_counter() < deadline:
+            url = urls[i % len(urls)]
+            i += 1
+            parts = urlsplit(url)
+            conn = conns.get(parts.netloc)
+            if conn is None:
+                conn = conns[parts.netloc] = http.client.HTTPConnection(parts.netloc, timeout=timeout)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path or "/")
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conns.pop(parts.netloc, None)
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies[url].append(elapsed)
+                else:
+                    errors[url] += 1
+        for conn in conns.values():
+            conn.close()
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    return {
+        url: {
+            "requests": len(latencies[url]),
+            "errors": errors[url],
+            "rps": round(len(latencies[url]) / wall, 1),
+            "p50_ms": round(percentile(latencies[url], 50), 1),
+            "p95_ms": round(percentile(latencies[url], 95), 1),
+            "p99_ms": round(percentile(latencies[url], 99), 1),
+        }
+        for url in urls
+    }
+
+
+def print_report(report: Dict[str, dict]) -> None:
+    print(f"{'url':<50} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for url, row in report.items():
+        print(f"{url[-50:]:<50} {row['requests']:>7} {row['errors']:>5} {row['rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 并发压测")
+    parser.add_argument("--base", default="http://127.0.0.1:8000", help="服务地址")
+    parser.add_argument("--url", action="append", required=True, help="请求地址，可为相对路径，可重复")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    urls = [urljoin(args.base, url) for url in args.url]
+    print(f"🚀 并发 {args.concurrency}，持续 {args.duration}s")
+    print_report(run_load(urls, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
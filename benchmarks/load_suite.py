@@ -0,0 +1,234 @@
+# benchmarks/load_suite.py
+# HTTP 压测场景集：基于 benchmarks.synthetic_data 生成的大规模历史数据，逐个场景压测看板分页、搜索、
+# 长区间导出与趋势 / 明细接口，记录每个场景的吞吐与 p50/p95/p99，并与保存的基线对比
+#
+# 默认在子进程中启动 uvicorn（指向数据目录中的数据库 / 员工名单 / 归档目录，不读写项目配置的路径）；
+# 也可用 --base 压测已运行的服务（此时需自行让服务使用同一份数据）
+#
+# 基线与机器强相关，更换硬件或数据集后应重新保存；数据集参数与基线不一致时会给出提示
+#
+# 用法：
+#   python -m benchmarks.synthetic_data --out bench_data
+#   python -m benchmarks.load_suite --data bench_data --save-baseline benchmarks/baselines/load_suite.json
+#   python -m benchmarks.load_suite --data bench_data                      # 与默认基线对比，退化时退出码为 1
+#   python -m benchmarks.load_suite --data bench_data --scenario export_all --duration 30 --concurrency 4
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List
+from urllib.parse import urlencode
+
+from benchmarks.http_load import run_load
+from benchmarks.startup import _free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "load_suite.json")
+# 与基线比较时需要一致的数据集参数
+DATASET_KEYS = ("commits", "authors", "employees", "projects", "years", "seed", "archived")
+
+
+def load_manifest(data_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(data_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scenarios(manifest: Dict[str, Any]) -> Dict[str, str]:
+    """
+    场景名 -> 请求路径；日期区间按数据集的 until 推算，保证每次压测命中的数据量一致
+    """
+    until = date.fromisoformat(manifest["until"])
+    since = date.fromisoformat(manifest["since"])
+    authors = manifest["sample_authors"]
+    search = manifest["search"]
+
+    def path(endpoint: str, **params) -> str:
+        return f"{endpoint}?{urlencode(params)}"
+
+    quarter = {"start_date": (until - timedelta(days=89)).isoformat(), "end_date": until.isoformat()}
+    return {
+        "dashboard_7d": path("/", days=7),
+        "dashboard_30d_page3": path("/", days=30, page=3),
+        "dashboard_365d": path("/", days=365),
+        "dashboard_range_90d": path("/", **quarter),
+        "search_surname_30d": path("/", days=30, search=search["surname"]),
+        "search_names_180d": path("/", days=180, search=",".join(search["names"])),
+        "export_30d": path("/export", days=30),
+        "export_all": path("/export", start_date=since.isoformat(), end_date=until.isoformat()),
+        "trends_heavy_180d": path("/api/trends", author=authors["heavy"], days=180),
+        "trends_light_180d": path("/api/trends", author=authors["light"], days=180),
+        "detail_heavy_90d": path("/detail", author=authors["heavy"], **quarter),
+    }
+
+
+def serve(data_dir: str, port: int) -> None:
+    """
+    子进程：指向数据目录后运行 uvicorn（不在启动时同步，只压测查询）
+    """
+    from app.config import config
+
+    manifest = load_manifest(data_dir)
+    config.DATABASE_URL = f"sqlite:///{os.path.join(data_dir, manifest['database'])}"
+    config.ASYNC_DATABASE_URL = ""
+    config.EMPLOYEES_FILE = os.path.join(data_dir, manifest["employees_file"])
+    config.ARCHIVE_DIR = os.path.join(data_dir, manifest["archive_dir"])
+    config.SYNC_ON_STARTUP = False
+    config.LOG_LEVEL = "WARNING"
+
+    import uvicorn
+    uvicorn.run("app.main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_ready(port: int, proc: subprocess.Popen, timeout: float = 60) -> None:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn 进程提前退出，退出码 {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{timeout}s 内 /health 未就绪")
+
+
+def warm_up(base: str, path: str, timeout: float) -> float:
+    """
+    每个场景先请求一次（预热员工名单 / 查询缓存），返回耗时 ms；非 2xx 视为场景配置错误
+    """
+    conn = http.client.HTTPConnection(base.split("://", 1)[-1], timeout=timeout)
+    start = time.perf_counter()
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+    finally:
+        conn.close()
+    if response.status >= 400:
+        raise RuntimeError(f"{path} 返回 {response.status}")
+    return (time.perf_counter() - start) * 1000
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    p95 比基线慢超过 tolerance 或吞吐低于基线超过 tolerance 视为退化
+    """
+    failures = []
+    for name, row in results.items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{name}: p95 {row['p95_ms']}ms，基线 {base['p95_ms']}ms")
+        if base["rps"] and row["rps"] < base["rps"] * (1 - tolerance):
+            failures.append(f"{name}: 吞吐 {row['rps']} req/s，基线 {base['rps']} req/s")
+    return failures
+
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, Any] = None) -> None:
+    print(f"{'场景':<22} {'req':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  {'基线 p95 / rps':>18}")
+    for name, row in results.items():
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        ref = f"{base['p95_ms']:>8} / {base['rps']:<7}" if base else ""
+        print(f"{name:<22} {row['requests']:>6} {row['errors']:>4} {row['rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}  {ref:>18}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="大规模历史数据下的 HTTP 压测场景集")
+    parser.add_argument("--data", default="bench_data", help="benchmarks.synthetic_data 的输出目录")
+    parser.add_argument("--base", help="压测已运行的服务，不启动子进程")
+    parser.add_argument("--scenario", action="append", help="只运行指定场景，可重复")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="每个场景的持续秒数")
+    parser.add_argument("--timeout", type=float, default=120, help="单个请求超时秒数（全量导出较慢）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="对比的基线文件，不存在时跳过对比")
+    parser.add_argument("--save-baseline", metavar="PATH", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    # 子进程参数
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data)
+    if args.serve:
+        serve(data_dir, args.port)
+        return 0
+
+    manifest = load_manifest(data_dir)
+    selected = scenarios(manifest)
+    if args.scenario:
+        unknown = set(args.scenario) - set(selected)
+        if unknown:
+            parser.error(f"未知场景: {', '.join(sorted(unknown))}（可选: {', '.join(selected)}）")
+        selected = {name: path for name, path in selected.items() if name in args.scenario}
+
+    proc = None
+    base = args.base
+    if base is None:
+        port = _free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load_suite", "--serve", "--data", data_dir, "--port", str(port)],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        wait_ready(port, proc)
+        base = f"http://127.0.0.1:{port}"
+    base = base.rstrip("/")
+
+    print(f"🚀 数据集 {manifest['commits']} 条提交 / {manifest['employees']} 名员工 / {manifest['years']} 年"
+          f"（已归档 {manifest['archived']} 条），并发 {args.concurrency}，每个场景 {args.duration}s")
+    results = {}
+    try:
+        for name, path in selected.items():
+            first_ms = warm_up(base, path, args.timeout)
+            row = run_load([base + path], args.concurrency, args.duration, args.timeout)[base + path]
+            results[name] = dict(row, first_ms=round(first_ms, 1))
+            print(f"  {name:<22} 首次 {first_ms:8.1f}ms  p95 {row['p95_ms']:8.1f}ms  {row['rps']:>7} req/s", flush=True)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print()
+    print_results(results, baseline)
+
+    failures = [f"{name}: {row['errors']} 个请求失败" for name, row in results.items() if row["errors"]]
+    if baseline is not None:
+        changed = [key for key in DATASET_KEYS if baseline["dataset"].get(key) != manifest.get(key)]
+        if changed:
+            print(f"⚠️ 数据集参数与基线不一致（{', '.join(changed)}），对比结果仅供参考")
+        if baseline.get("concurrency") != args.concurrency:
+            print(f"⚠️ 并发数与基线不一致（基线 {baseline.get('concurrency')}），对比结果仅供参考")
+        failures += compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "dataset": {key: manifest.get(key) for key in DATASET_KEYS},
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "scenarios": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"📌 基线已保存: {args.save_baseline}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ 压测场景通过" + ("（已与基线对比）" if baseline is not None else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
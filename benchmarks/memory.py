@@ -0,0 +1,139 @@
+# benchmarks/memory.py
+# 同步内存基准：一天的有效提交在入库前全部驻留内存，比较每条提交的常驻字节数
+#   dict       原来的表示：每条提交一个 dict，字符串来自各自的 JSON 响应（互不共享），保留提交说明
+#   CommitData 现在的表示：__slots__ 对象，作者 / 邮箱 / 分支驻留，写完原始提交日志后释放提交说明
+# 另外比较写库阶段的内存峰值：整批生成行字典 vs 按 SAVE_CHUNK_SIZE 分块生成
+#
+# 用法：
+#   python -m benchmarks.memory                         # 默认 50000 条提交、2000 名作者
+#   python -m benchmarks.memory --commits 500000 --authors 5000 --budget-bytes 700
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from app.commit_data import CommitData
+from app.services.sync_service import SAVE_CHUNK_SIZE, to_row
+
+
+def api_payloads(commits: int, authors: int, branches: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    模拟 GitLab commit 详情接口的响应：经 json.loads 解码，每条响应中的字符串都是独立对象
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for _ in range(commits):
+        author = rng.randrange(authors)
+        items.append({
+            "id": f"{rng.getrandbits(160):040x}",
+            "author_name": f"author{author}",
+            "author_email": f"author{author}@example.com",
+            "committer_email": f"author{author}@example.com",
+            "committed_date": (start + timedelta(seconds=rng.randrange(86400))).isoformat(),
+            "parent_ids": [f"{rng.getrandbits(160):040x}"],
+            "message": "feat: " + " ".join(rng.choice(("fix", "add", "update", "refactor", "test")) for _ in range(12)),
+            "stats": {"additions": rng.randrange(200), "deletions": rng.randrange(100)},
+            "project_id": rng.randrange(1, 500),
+            "branch": f"feature/{rng.randrange(branches)}",
+        })
+    return [json.loads(line) for line in (json.dumps(item) for item in items)]
+
+
+def _fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "instance": "default",
+        "project_id": item["project_id"],
+        "branch": item["branch"],
+        "author_name": item["author_name"],
+        "author_email": item["author_email"],
+        "com_email": item["committer_email"],
+        "commit_date": datetime.fromisoformat(item["committed_date"]),
+        "additions": item["stats"]["additions"],
+        "deletions": item["stats"]["deletions"],
+        "commit_id": item["id"],
+        "parent_ids": item["parent_ids"],
+        "message": item["message"].strip(),
+    }
+
+
+def as_dict(item: Dict[str, Any]) -> Dict[str, Any]:
+    return _fields(item)
+
+
+def as_commit_data(item: Dict[str, Any]) -> CommitData:
+    record = CommitData(**_fields(item))
+    record.pop("message", None)
+    return record
+
+
+def retained_bytes(build: Callable[[Dict[str, Any]], Any], payloads: List[Dict[str, Any]]) -> float:
+    """
+    构建全部记录并释放 API 响应后，记录仍占用的字节数 / 条（包括记录引用的字符串、datetime 等）
+    """
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    # 每轮使用响应的深拷贝，避免上一轮驻留的字符串影响本轮
+    items = json.loads(json.dumps(payloads))
+    records = [build(item) for item in items]
+    del items
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del records
+    return used / len(payloads)
+
+
+def save_peak_bytes(records: List[Any], chunked: bool) -> int:
+    """
+    写库阶段生成行字典的内存峰值（不含记录本身）
+    """
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    if chunked:
+        for i in range(0, len(records), SAVE_CHUNK_SIZE):
+            rows = [to_row(record) for record in records[i:i + SAVE_CHUNK_SIZE]]
+    else:
+        rows = [to_row(record) for record in records]
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    del rows
+    return peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="同步内存基准")
+    parser.add_argument("--commits", type=int, default=50000)
+    parser.add_argument("--authors", type=int, default=2000)
+    parser.add_argument("--branches", type=int, default=50)
+    parser.add_argument("--budget-bytes", type=float, default=0, help="CommitData 每条常驻字节数上限，0 表示不检查")
+    args = parser.parse_args()
+
+    payloads = api_payloads(args.commits, args.authors, args.branches)
+    before = retained_bytes(as_dict, payloads)
+    after = retained_bytes(as_commit_data, payloads)
+    print(f"{args.commits} 条提交，{args.authors} 名作者，{args.branches} 个分支")
+    print(f"  dict       {before:8.0f} B/条  {before * args.commits / 2 ** 20:8.1f} MiB")
+    print(f"  CommitData {after:8.0f} B/条  {after * args.commits / 2 ** 20:8.1f} MiB  （-{1 - after / before:.0%}）")
+
+    records = [as_commit_data(item) for item in payloads]
+    del payloads
+    whole = save_peak_bytes(records, chunked=False)
+    chunked = save_peak_bytes(records, chunked=True)
+    print(f"写库阶段行字典峰值：整批 {whole / 2 ** 20:.1f} MiB，分块 {chunked / 2 ** 20:.1f} MiB")
+
+    if args.budget_bytes and after > args.budget_bytes:
+        print(f"❌ 每条提交常驻 {after:.0f} B，超出预算 {args.budget_bytes:.0f} B")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# benchmarks/startup.py
+# 启动耗时基准：import app.main 耗时、重依赖是否被提前加载、冷启动到首个 /health 响应的耗时
+#
+# 用法：
+#   python -m benchmarks.startup                      # 默认各跑 5 次，超出预算时退出码为 1
+#   python -m benchmarks.startup --runs 10 --import-budget-ms 600 --startup-budget-ms 750
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在查询 / 同步 / 读取 Excel / 定时任务时才需要的依赖，import app.main 时不应加载
+LAZY_MODULES = [
+    "pandas", "numpy", "openpyxl", "gitlab", "apscheduler", "pytz", "pyarrow", "sqlalchemy", "aiosqlite", "requests",
+]
+
+
+def _python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+
+def import_time(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    用 -X importtime 测量一次导入耗时
+    返回: (总耗时 ms, [(直接依赖模块, 累计耗时 ms), ...] 按耗时倒序)
+    """
+    stderr = _python(f"import {module}", "-X", "importtime").stderr
+    # 子模块先于父模块输出：遇到顶层模块行时，之前收集的二级行即为它的直接依赖
+    children: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        ms = int(cumulative) / 1000
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            if name.strip() == module:
+                return ms, sorted(children.items(), key=lambda item: item[1], reverse=True)
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = ms
+    return 0.0, []
+
+
+def loaded_lazy_modules(module: str) -> List[str]:
+    code = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    return [m for m in _python(code).stdout.strip().split(",") if m]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cold_start(app: str, timeout: float = 30) -> float:
+    """
+    启动一个新的 uvicorn 进程，返回从 spawn 到 /health 首次返回 200 的耗时（ms）
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn 进程提前退出，退出码 {proc.returncode}")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"{timeout}s 内 /health 未就绪")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--app", default="app.main:app", help="uvicorn 应用路径")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=650)
+    parser.add_argument("--startup-budget-ms", type=float, default=850)
+    parser.add_argument("--top", type=int, default=8, help="输出耗时最高的直接依赖数量")
+    args = parser.parse_args()
+
+    failures = []
+
+    samples = [import_time(args.module) for _ in range(args.runs)]
+    import_ms = statistics.median(total for total, _ in samples)
+    print(f"import {args.module}: 中位数 {import_ms:.0f}ms（预算 {args.import_budget_ms:.0f}ms）")
+    for name, ms in samples[-1][1][:args.top]:
+        print(f"  {name:<40} {ms:8.1f}ms")
+    if import_ms > args.import_budget_ms:
+        failures.append("import 耗时超出预算")
+
+    eager = loaded_lazy_modules(args.module)
+    print(f"提前加载的重依赖: {', '.join(eager) if eager else '无'}")
+    if eager:
+        failures.append(f"import {args.module} 时加载了 {', '.join(eager)}")
+
+    startup = [cold_start(args.app) for _ in range(args.runs)]
+    startup_ms = statistics.median(startup)
+    print(f"冷启动到首个 /health: 中位数 {startup_ms:.0f}ms，最大 {max(startup):.0f}ms"
+          f"（预算 {args.startup_budget_ms:.0f}ms）")
+    if startup_ms > args.startup_budget_ms:
+        failures.append("冷启动耗时超出预算")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ 启动耗时在预算内")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# benchmarks/sync.py
+# 同步基准：启动本地 GitLab 桩服务（benchmarks.gitlab_stub），在独立子进程中端到端执行 sync_yesterday_commits，
+# 统计耗时、请求数（应用层计数、客户端实发与桩服务实收）、应用层 / 传输层重试、注入的错误、峰值 RSS 与写入行数，并与合成数据推算的应写入行数核对
+#
+# 每次运行使用全新的临时数据库 / 原始提交日志 / diff 缓存目录，不读写项目配置的路径
+#
+# 用法：
+#   python -m benchmarks.sync                                         # 50 个项目 × 3 个分支 × 20 条 / 天，跑 3 次
+#   python -m benchmarks.sync --projects 300 --latency-ms 30 --jitter-ms 20 --max-workers 20
+#   python -m benchmarks.sync --throttle-rate 0.02 --error-rate 0.005 --diff-stats
+#   python -m benchmarks.sync --budget-seconds 20 --budget-rss-mib 300        # 超出预算时退出码为 1
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Dict
+
+from benchmarks.gitlab_stub import SyntheticGitLab, add_options, options_from_args, serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def expected_rows(data: SyntheticGitLab, day: str, diff_stats: bool = False) -> int:
+    """
+    按当前过滤规则推算合成数据中应写入的有效提交数（按 SHA 去重）
+    diff_stats 为 True 时与同步一致：按 DIFF_EXCLUDE_GLOBS 排除文件后再判断 MAX_ADDITIONS
+    """
+    from app.commit_filter import get_filter
+    from app.utils.diff_stats import apply_file_stats, parse_diff
+
+    commit_filter = get_filter()
+    accepted = set()
+    for project_id in range(1, data.options.projects + 1):
+        for branch in data.branch_names(project_id):
+            for commit in data.commits(project_id, branch, day):
+                record = dict(commit, additions=commit["stats"]["additions"], deletions=commit["stats"]["deletions"])
+                if diff_stats:
+                    record["files"] = parse_diff(data.diff(commit))
+                    apply_file_stats(record)
+                # 行数无法确定（见 apply_file_stats）的提交同步时不入库
+                if record["additions"] is not None and commit_filter.reason(record) is None:
+                    accepted.add(commit["id"])
+    return len(accepted)
+
+
+def run_child(args: argparse.Namespace) -> None:
+    """
+    子进程：指向桩服务与临时目录后执行一次同步，结果写入 workdir/result.json
+    """
+    workdir = args.workdir
+    from app.config import config, GitLabInstance
+
+    config.DATABASE_URL = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    config.ASYNC_DATABASE_URL = ""
+    config.JOURNAL_DIR = os.path.join(workdir, "journal")
+    config.DIFF_CACHE_DIR = os.path.join(workdir, "diff_cache")
+    config.ARCHIVE_DIR = os.path.join(workdir, "archive")
+    config.MAPPING_FILE = os.path.join(workdir, "mapping.json")
+    config.SYNC_MODE = "local"
+    config.DIFF_STATS_ENABLED = args.diff_stats
+    config.LOG_LEVEL = args.log_level
+    config.GITLAB_INSTANCES = [GitLabInstance(
+        name="bench", url=args.url, token="stub-token", max_workers=args.max_workers,
+        pool_size=max(args.max_workers, 10), requests_per_second=args.requests_per_second,
+    )]
+    # 与实际部署一致的映射表（org -> res），映射的作者不影响写入行数
+    with open(config.MAPPING_FILE, "w", encoding="utf-8") as f:
+        json.dump([{"org": "dev0", "res": "开发者 0"}], f, ensure_ascii=False)
+
+    from app.utils.logger import setup_logging
+    setup_logging()
+    from app.services.sync_progress import get_run
+    from app.services.sync_service import sync_yesterday_commits
+    from app.utils.gitlab_client import create_client
+
+    # python-gitlab 对 429 按 Retry-After 自动重试（obey_rate_limit，未开启 retry_transient_errors 时 5xx 直接抛给应用层），
+    # 这些传输层重试不经过 _record_retry；在客户端会话上挂响应钩子统计实际发出的请求与 429 响应（认证请求不计入）
+    responses = {"total": 0, "throttled": 0}
+    lock = threading.Lock()
+
+    def count_response(response, *_, **__):
+        with lock:
+            responses["total"] += 1
+            responses["throttled"] += response.status_code == 429
+
+    create_client("bench").session.hooks["response"].append(count_response)
+
+    start = time.perf_counter()
+    result = sync_yesterday_commits(force=True, trigger="manual")
+    wall = time.perf_counter() - start
+    run = get_run(result["job_id"]) or {}
+
+    try:
+        import resource
+        # Linux 上 ru_maxrss 单位为 KB，macOS 为字节
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mib = rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+    except ImportError:
+        peak_rss_mib = None
+
+    with open(os.path.join(workdir, "result.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "status": run.get("status", result["status"]),
+            "wall_seconds": wall,
+            "api_calls": run.get("api_calls", 0),
+            "retries": run.get("retries", 0),
+            "client_requests": responses["total"],
+            "transport_retries": responses["throttled"],
+            "projects_scanned": run.get("projects_scanned", 0),
+            "rows_written": run.get("rows_written", 0),
+            "peak_rss_mib": peak_rss_mib,
+        }, f)
+
+
+def _stub_request(base: str, path: str, method: str = "GET") -> Dict[str, Any]:
+    request = urllib.request.Request(base + path, method=method)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)
+
+
+def run_once(args: argparse.Namespace, base: str) -> Dict[str, Any]:
+    _stub_request(base, "/_stub/reset", "POST")
+    with tempfile.TemporaryDirectory(prefix="sync-bench-") as workdir:
+        command = [
+            sys.executable, "-m", "benchmarks.sync", "--child", "--url", base, "--workdir", workdir,
+            "--max-workers", str(args.max_workers), "--requests-per-second", str(args.requests_per_second),
+            "--log-level", args.log_level,
+        ] + (["--diff-stats"] if args.diff_stats else [])
+        output = None if args.verbose else subprocess.DEVNULL
+        subprocess.run(command, cwd=ROOT, check=True, stdout=output, stderr=output)
+        with open(os.path.join(workdir, "result.json"), encoding="utf-8") as f:
+            result = json.load(f)
+    stub = _stub_request(base, "/_stub/stats")
+    result.update(server_requests=stub["total"], injected=stub["injected"], by_endpoint=stub["requests"])
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="基于本地 GitLab 桩服务的同步基准")
+    add_options(parser)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=10, help="项目并发数（GitLabInstance.max_workers）")
+    parser.add_argument("--requests-per-second", type=float, default=0, help="客户端限速，0 表示不限速")
+    parser.add_argument("--diff-stats", action="store_true", help="开启 DIFF_STATS_ENABLED（额外请求 diff）")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--verbose", action="store_true", help="输出同步子进程的日志")
+    parser.add_argument("--budget-seconds", type=float, default=0, help="耗时中位数上限，0 表示不检查")
+    parser.add_argument("--budget-rss-mib", type=float, default=0, help="峰值 RSS 上限，0 表示不检查")
+    # 子进程参数
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    options = options_from_args(args)
+    server = serve(options)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        from app.utils.gitlab_client import yesterday_range
+        expected = expected_rows(server.data, yesterday_range()[0][:10], args.diff_stats)
+        print(f"桩服务 {base}：{options.projects} 个项目 × {options.branches} 个分支 × "
+              f"{options.commits_per_day} 条 / 天，延迟 {options.latency_ms:.0f}±{options.jitter_ms:.0f}ms，"
+              f"429 {options.throttle_rate:.1%} / 500 {options.error_rate:.1%}；应写入 {expected} 行")
+
+        results = []
+        for n in range(1, args.runs + 1):
+            result = run_once(args, base)
+            results.append(result)
+            rss = f"{result['peak_rss_mib']:.0f}MiB" if result["peak_rss_mib"] is not None else "n/a"
+            print(f"  #{n} {result['status']:<8} {result['wall_seconds']:7.2f}s  "
+                  f"请求 {result['api_calls']}（实发 {result['client_requests']}，桩实收 {result['server_requests']}，"
+                  f"重试 应用层 {result['retries']} / 传输层 {result['transport_retries']}，"
+                  f"注入 429×{result['injected']['429']} 500×{result['injected']['500']}）  "
+                  f"峰值 RSS {rss}  写入 {result['rows_written']} 行")
+    finally:
+        server.shutdown()
+
+    wall = statistics.median(r["wall_seconds"] for r in results)
+    rss_values = [r["peak_rss_mib"] for r in results if r["peak_rss_mib"] is not None]
+    peak_rss = max(rss_values) if rss_values else None
+    print(f"耗时中位数 {wall:.2f}s，吞吐 {expected / wall:.0f} 行/s"
+          + (f"，峰值 RSS {peak_rss:.0f}MiB" if peak_rss is not None else ""))
+    print("桩服务按接口请求数（最后一次）：" + "，".join(
+        f"{endpoint} {count}" for endpoint, count in sorted(results[-1]["by_endpoint"].items())
+    ))
+
+    # 注入的 429 / 500 应由重试消化：注入错误时写入行数同样必须与合成数据一致
+    print(f"写入行数（应写入 {expected}）：" + "，".join(str(r["rows_written"]) for r in results))
+    failures = []
+    if any(r["status"] != "success" for r in results):
+        failures.append("存在未成功的同步")
+    if any(r["rows_written"] != expected for r in results):
+        failures.append("写入行数与合成数据不一致")
+    if args.budget_seconds and wall > args.budget_seconds:
+        failures.append(f"耗时中位数超出预算 {args.budget_seconds:.1f}s")
+    if args.budget_rss_mib and peak_rss is not None and peak_rss > args.budget_rss_mib:
+        failures.append(f"峰值 RSS 超出预算 {args.budget_rss_mib:.0f}MiB")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ 同步基准通过")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+# benchmarks/synthetic_data.py
+# 合成大规模历史数据：按接近真实的分布生成 commit_records（可选把超过保留期的部分归档为 Parquet），
+# 并生成对应的员工名单，供 benchmarks.load_suite 压测看板 / 导出 / 趋势接口
+#
+# 分布：
+#   作者   提交数呈长尾（Zipf），少数人贡献大部分提交；员工名单另含约 10% 没有提交的人员
+#   日期   工作日远多于周末，白天多于夜间，越近的时间提交越多（团队增长）
+#   行数   additions 为对数正态分布（中位数约 20 行、长尾），不超过 MAX_ADDITIONS；deletions 与之相关
+#   项目   项目活跃度同样为 Zipf；分支以 main / develop 为主，其余为 feature 分支
+#
+# 输出目录布局（manifest.json 记录生成参数与压测用的样例作者）：
+#   OUT/gitlab.db  OUT/employee.xlsx  OUT/archive/YYYY-MM.parquet  OUT/manifest.json
+#
+# 用法：
+#   python -m benchmarks.synthetic_data --out bench_data                          # 200 万条提交、3000 名作者、3 年
+#   python -m benchmarks.synthetic_data --out bench_data --commits 300000 --authors 800 --years 1 --no-archive
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤"
+GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红鹏飞鑫波宇浩凯健俊帆帅旭宁龙林欣佳琳晨辰思雨子轩梓涵一诺博文天佑嘉怡"
+DEPARTMENTS = [f"研发{n}部" for n in "一二三四五六七八九十"] + ["平台组", "数据组", "测试组", "运维组", "前端组", "移动端组"]
+
+# 一天中各小时的提交权重（0-23 点）
+HOUR_WEIGHTS = [1, 0.5, 0.3, 0.2, 0.2, 0.3, 0.5, 1, 3, 6, 9, 10, 6, 5, 9, 10, 10, 9, 7, 5, 4, 3, 2, 1.5]
+# 周一到周日的权重
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.95, 0.2, 0.1]
+MAX_ADDITIONS = 2000
+INSERT_BATCH = 50000
+
+
+def unique_names(count: int, rng: random.Random) -> List[str]:
+    """
+    生成 count 个不重复的中文姓名（两字或三字）
+    """
+    names = set()
+    while len(names) < count:
+        given = rng.choice(GIVEN) + (rng.choice(GIVEN) if rng.random() < 0.7 else "")
+        names.add(rng.choice(SURNAMES) + given)
+    ordered = sorted(names)
+    rng.shuffle(ordered)
+    return ordered
+
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def day_cum_weights(since: date, until: date) -> Tuple[List[date], List[float]]:
+    """
+    逐日权重：星期系数 × 增长系数（起始日 0.4 线性增长到最近一天 1.0）
+    """
+    days = [since + timedelta(days=n) for n in range((until - since).days + 1)]
+    span = max(len(days) - 1, 1)
+    weights = [WEEKDAY_WEIGHTS[d.weekday()] * (0.4 + 0.6 * n / span) for n, d in enumerate(days)]
+    return days, list(accumulate(weights))
+
+
+def generate_days(commits: int, authors: List[str], projects: int, since: date, until: date,
+                  rng: random.Random, counts: Counter) -> Iterator[List[Tuple]]:
+    """
+    按日期顺序逐日生成 commit_records 行（每天的行按提交时间排序），不在内存中保留全部提交
+    counts 累计每个作者的提交数
+    """
+    author_cw = zipf_cum_weights(len(authors), 0.9)
+    project_cw = zipf_cum_weights(projects, 1.1)
+    days, day_cw = day_cum_weights(since, until)
+    hour_cw = list(accumulate(HOUR_WEIGHTS))
+    emails = {name: f"u{n}@example.com" for n, name in enumerate(authors)}
+    per_day = Counter(rng.choices(range(len(days)), cum_weights=day_cw, k=commits))
+
+    for index, day in enumerate(days):
+        total = per_day[index]
+        if not total:
+            continue
+        midnight = datetime.combine(day, datetime.min.time())
+        author_picks = rng.choices(authors, cum_weights=author_cw, k=total)
+        hour_picks = rng.choices(range(24), cum_weights=hour_cw, k=total)
+        project_picks = rng.choices(range(1, projects + 1), cum_weights=project_cw, k=total)
+        rows = []
+        for name, hour, project_id in zip(author_picks, hour_picks, project_picks):
+            counts[name] += 1
+            committed = midnight + timedelta(hours=hour, seconds=rng.randrange(3600))
+            additions = min(int(rng.lognormvariate(3.0, 1.3)), MAX_ADDITIONS)
+            deletions = int(additions * rng.random() * 0.8) + rng.randrange(3)
+            roll = rng.random()
+            branch = "main" if roll < 0.5 else "develop" if roll < 0.7 else f"feature/{rng.randrange(5000)}"
+            email = emails[name]
+            rows.append((
+                f"{rng.getrandbits(160):040x}", project_id, branch, name, email, email,
+                committed.strftime("%Y-%m-%d %H:%M:%S.%f"), additions, deletions,
+                str([f"{rng.getrandbits(160):040x}"]), "default",
+            ))
+        rows.sort(key=lambda row: row[6])
+        yield rows
+
+
+def write_database(path: str, batches: Iterable[List[Tuple]]) -> int:
+    """
+    通过迁移建表后批量写入（导入期间关闭同步写盘，完成后恢复），返回写入行数
+    """
+    from app.database.migrations import run_migrations
+    run_migrations()
+
+    written = 0
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        pending: List[Tuple] = []
+        for rows in batches:
+            pending.extend(rows)
+            if len(pending) >= INSERT_BATCH:
+                written += _insert(conn, pending)
+                pending = []
+        written += _insert(conn, pending)
+        conn.commit()
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+    return written
+
+
+def _insert(conn: sqlite3.Connection, rows: List[Tuple]) -> int:
+    conn.executemany(
+        "INSERT INTO commit_records (commit_id, project_id, branch, author_name, author_email, com_email, "
+        "commit_date, additions, deletions, parent_ids, instance) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    return len(rows)
+
+
+def write_employees(path: str, names: List[str], rng: random.Random) -> None:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["姓名", "部门"])
+    for name in names:
+        sheet.append([name, rng.choice(DEPARTMENTS)])
+    workbook.save(path)
+
+
+def sample_authors(counts: Counter) -> Dict[str, str]:
+    """
+    压测用的样例作者：提交最多 / 中位 / 最少（至少 1 条）的作者
+    """
+    ranked = [name for name, _ in counts.most_common()]
+    return {"heavy": ranked[0], "median": ranked[len(ranked) // 2], "light": ranked[-1]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="生成大规模合成提交数据与员工名单")
+    parser.add_argument("--out", default="bench_data", help="输出目录（已存在的数据库会被覆盖）")
+    parser.add_argument("--commits", type=int, default=2000000)
+    parser.add_argument("--authors", type=int, default=3000)
+    parser.add_argument("--idle-ratio", type=float, default=0.1, help="员工名单中没有提交的人员比例")
+    parser.add_argument("--projects", type=int, default=800)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-archive", action="store_true", help="全部保留在 commit_records，不归档为 Parquet")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out)
+    os.makedirs(out, exist_ok=True)
+    db_path = os.path.join(out, "gitlab.db")
+    archive_dir = os.path.join(out, "archive")
+    employees_path = os.path.join(out, "employee.xlsx")
+    for stale in (db_path, os.path.join(out, "manifest.json")):
+        if os.path.exists(stale):
+            os.remove(stale)
+    if os.path.isdir(archive_dir):
+        for name in os.listdir(archive_dir):
+            os.remove(os.path.join(archive_dir, name))
+
+    # 指向输出目录后再导入 app.database（engine 在导入时按 DATABASE_URL 创建）
+    from app.config import config
+    config.DATABASE_URL = f"sqlite:///{db_path}"
+    config.ASYNC_DATABASE_URL = ""
+    config.ARCHIVE_DIR = archive_dir
+
+    rng = random.Random(args.seed)
+    until = date.today() - timedelta(days=1)
+    since = until - timedelta(days=int(args.years * 365))
+    idle = int(args.authors * args.idle_ratio)
+    names = unique_names(args.authors + idle, rng)
+    authors, idle_names = names[:args.authors], names[args.authors:]
+
+    counts: Counter = Counter()
+    started = time.perf_counter()
+    written = write_database(db_path, generate_days(args.commits, authors, args.projects, since, until, rng, counts))
+    print(f"生成并写入 {written} 条提交（{len(counts)} 名作者）到 {db_path}：{time.perf_counter() - started:.1f}s",
+          flush=True)
+
+    roster = authors + idle_names
+    rng.shuffle(roster)
+    write_employees(employees_path, roster, rng)
+    print(f"员工名单 {employees_path}：{len(roster)} 人（其中 {len(idle_names)} 人没有提交）")
+
+    archived = 0
+    if not args.no_archive:
+        from app.services.archive_service import archive_cold_commits
+        started = time.perf_counter()
+        archived = archive_cold_commits()
+        print(f"归档 {archived} 条早于 {config.ARCHIVE_HORIZON_DAYS} 天的提交：{time.perf_counter() - started:.1f}s")
+
+    # 搜索用例：最常见的姓氏（匹配大量员工）与两个具体姓名
+    surname_counts = Counter(name[0] for name in roster)
+    manifest: Dict[str, Any] = {
+        "commits": args.commits,
+        "authors": args.authors,
+        "employees": len(roster),
+        "projects": args.projects,
+        "years": args.years,
+        "seed": args.seed,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "archived": archived,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "database": "gitlab.db",
+        "employees_file": "employee.xlsx",
+        "archive_dir": "archive",
+        "sample_authors": sample_authors(counts),
+        "search": {
+            "surname": surname_counts.most_common(1)[0][0],
+            "names": [authors[len(authors) // 3], authors[-1]],
+        },
+    }
+    with open(os.path.join(out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"✅ 数据已生成：{out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())